@@ -0,0 +1,114 @@
+"""
+Benchmark cases. Each case has a setup, building the arguments of a single
+run out of the shared input data (not timed), and the timed function.
+"""
+from datetime import timedelta
+
+import numpy as np
+
+from gregory.dataclass.columnar_data import EncodedRows
+from gregory.dataclass.time_series_data import TimeSeriesData
+from gregory.granularity.granularity import MonthlyGranularity, WeeklyGranularity
+from gregory.timeseries.batches import aggregate, pick_a_day, pick_a_weekday, split
+from gregory.timeseries.expr import list_intersection, list_union
+from gregory.timeseries.panel import TimeSeriesPanel
+from gregory.timeseries.processing import add_trend_seasonality
+from gregory.timeseries.time_series import TimeSeries
+from gregory.util.dictionaries import aggregate_dicts
+
+from generators import generate_rows, generate_time_series
+
+
+def merge_dicts(dicts):
+    return {k: v for d in dicts if d for k, v in d.items()}
+
+
+def max_of_dicts(dicts):
+    return aggregate_dicts(dicts, method=max)
+
+
+class Inputs:
+    """Shared input data of the benchmark cases, generated once for each scale."""
+
+    def __init__(self, n_days: int, n_titles: int, sparsity: float, seed: int = 0):
+        self.ts = generate_time_series(n_days, n_titles, sparsity, seed=seed)
+        self.title = self.ts.titles[0]
+        self.shifted = [
+            generate_time_series(
+                n_days, n_titles, sparsity, start_date=self.ts.start_date + timedelta(days=shift), seed=seed + shift
+            )
+            for shift in (7, 30)
+        ]
+        self.rows = generate_rows(n_days * n_titles // 2, n_days + 30, n_titles + 5, start_date=self.ts.start_date, seed=seed)
+        self.dicts = [element.data for element in self.ts]
+        titles = sorted({row[2] for row in self.rows})
+        self.encoded_rows = EncodedRows(
+            dates=np.array([row[0] for row in self.rows], dtype='datetime64[D]'),
+            values=np.array([row[1] for row in self.rows], dtype=np.float64),
+            codes=np.array([titles.index(row[2]) for row in self.rows], dtype=np.int32),
+            titles=titles,
+        )
+
+    def fresh(self) -> TimeSeries:
+        """Copy of the input time series, without cached properties."""
+        return TimeSeries([TimeSeriesData(day=element.day, data=dict(element.data)) for element in self.ts])
+
+
+CASES = {
+    'as_array': (lambda inputs: (inputs.fresh(),), lambda ts: ts.as_array),
+    'as_np_array': (lambda inputs: (inputs.fresh(),), lambda ts: ts.as_np_array()),
+    'as_encoded_array': (lambda inputs: (inputs.fresh(),), lambda ts: ts.as_encoded_array()),
+    'filter_by_title': (lambda inputs: (inputs.fresh(), inputs.title), lambda ts, title: ts.filter_by_title(title)),
+    'filter_by_title_inplace': (
+        lambda inputs: (inputs.fresh(), inputs.title),
+        lambda ts, title: ts.filter_by_title(title, inplace=True)
+    ),
+    'interpolate': (lambda inputs: (inputs.fresh(), inputs.title), lambda ts, title: ts.interpolate(title)),
+    'interpolate_all': (lambda inputs: (inputs.fresh(),), lambda ts: ts.interpolate_all()),
+    'get_series_or_empty': (
+        lambda inputs: (inputs.fresh(), [row[0] for row in inputs.rows[:10000]]),
+        lambda ts, days: [ts.get_series_or_empty(day) for day in days]
+    ),
+    'append': (
+        lambda inputs: (TimeSeries(inputs.fresh()[:2]), inputs.fresh()[2:]),
+        lambda ts, elements: [ts.append(element) for element in elements]
+    ),
+    'update_from_array': (lambda inputs: (inputs.fresh(), inputs.rows), lambda ts, rows: ts.update_from_array(rows)),
+    'update_from_encoded_array': (
+        lambda inputs: (inputs.fresh(), inputs.encoded_rows),
+        lambda ts, rows: ts.update_from_array(rows)
+    ),
+    'list_union': (lambda inputs: ([inputs.ts] + inputs.shifted,), lambda ts_list: list_union(ts_list, merge_dicts)),
+    'list_intersection': (
+        lambda inputs: ([inputs.ts] + inputs.shifted,),
+        lambda ts_list: list_intersection(ts_list, merge_dicts)
+    ),
+    'panel_union': (
+        lambda inputs: (TimeSeriesPanel.from_time_series([inputs.ts] + inputs.shifted),),
+        lambda panel: panel.union('sum')
+    ),
+    'aggregate_dicts': (lambda inputs: (inputs.dicts,), lambda dicts: aggregate_dicts(dicts)),
+    'aggregate_weekly': (lambda inputs: (inputs.fresh(),), lambda ts: aggregate(ts, 'sum', WeeklyGranularity())),
+    'aggregate_monthly_mean': (lambda inputs: (inputs.fresh(),), lambda ts: aggregate(ts, 'mean', MonthlyGranularity())),
+    'aggregate_custom': (
+        lambda inputs: (inputs.fresh(),),
+        lambda ts: aggregate(ts, max_of_dicts, MonthlyGranularity())
+    ),
+    'pick_a_day': (lambda inputs: (inputs.fresh(),), lambda ts: pick_a_day(ts, WeeklyGranularity())),
+    'pick_a_weekday': (lambda inputs: (inputs.fresh(),), lambda ts: pick_a_weekday(ts, MonthlyGranularity())),
+    'split': (lambda inputs: (inputs.fresh(),), lambda ts: split(ts, MonthlyGranularity())),
+    'resample_monthly_sum': (lambda inputs: (inputs.fresh(),), lambda ts: ts.resample(MonthlyGranularity(), how='sum')),
+    'add_trend_seasonality': (
+        lambda inputs: (inputs.fresh(), inputs.title),
+        lambda ts, title: add_trend_seasonality(ts, label=title)
+    ),
+    'add_trend_seasonality_all': (
+        lambda inputs: (inputs.fresh(),),
+        lambda ts: add_trend_seasonality(ts, labels='all')
+    ),
+    'rolling_mean': (lambda inputs: (inputs.fresh(),), lambda ts: ts.rolling(window=30, how='mean')),
+    'rolling_max_monthly': (
+        lambda inputs: (inputs.fresh(),),
+        lambda ts: ts.rolling(window=MonthlyGranularity(), how='max')
+    ),
+}
@@ -0,0 +1,79 @@
+"""Synthetic data generators for the benchmark suite."""
+from datetime import date, timedelta
+from typing import List
+
+import numpy as np
+
+from gregory.dataclass.time_series_data import TimeSeriesData
+from gregory.timeseries.time_series import TimeSeries
+
+
+def generate_time_series(
+        n_days: int,
+        n_titles: int,
+        sparsity: float = 0.,
+        start_date: date = date(2000, 1, 1),
+        seed: int = 0,
+) -> TimeSeries:
+    """
+    Generate a daily time series of random values. The first and last days
+    have all the titles, so that every title can be interpolated.
+
+    Args:
+        n_days (int): Number of days.
+        n_titles (int): Number of titles of each day.
+        sparsity (float, optional): Probability of each value to be missing.
+        Defaults to 0.
+        start_date (date, optional): First day. Defaults to 2000-01-01.
+        seed (int, optional): Seed of the random generator. Defaults to 0.
+
+    Returns:
+        TimeSeries: Generated time series.
+    """
+    rng = np.random.default_rng(seed)
+    titles = [f"title_{i}" for i in range(n_titles)]
+    values = np.round(rng.uniform(200, 300, size=(n_days, n_titles)), 2).tolist()
+    present = rng.random(size=(n_days, n_titles)) >= sparsity
+    present[[0, -1]] = True
+    present = present.tolist()
+    return TimeSeries([
+        TimeSeriesData(
+            day=start_date + timedelta(days=i),
+            data={title: v for title, v, p in zip(titles, day_values, day_present) if p}
+        )
+        for i, (day_values, day_present) in enumerate(zip(values, present))
+    ])
+
+
+def generate_rows(
+        n_rows: int,
+        n_days: int,
+        n_titles: int,
+        start_date: date = date(2000, 1, 1),
+        seed: int = 0,
+) -> List[list]:
+    """
+    Generate random rows in the format consumed by
+    TimeSeries.update_from_array: [[date, value, title]].
+
+    Args:
+        n_rows (int): Number of rows.
+        n_days (int): Number of days to draw the dates from.
+        n_titles (int): Number of titles to draw the titles from.
+        start_date (date, optional): First day. Defaults to 2000-01-01.
+        seed (int, optional): Seed of the random generator. Defaults to 0.
+
+    Returns:
+        List[list]: Generated rows.
+    """
+    rng = np.random.default_rng(seed)
+    days = [start_date + timedelta(days=int(i)) for i in range(n_days)]
+    titles = [f"title_{i}" for i in range(n_titles)]
+    return [
+        [days[d], v, titles[t]]
+        for d, v, t in zip(
+            rng.integers(0, n_days, n_rows).tolist(),
+            np.round(rng.uniform(200, 300, n_rows), 2).tolist(),
+            rng.integers(0, n_titles, n_rows).tolist(),
+        )
+    ]
@@ -0,0 +1,118 @@
+"""
+Run the benchmark suite on synthetic data, reporting time and peak memory of
+each case, and optionally save the results as a baseline or compare them
+with a previous one.
+
+Usage:
+    python benchmarks/run.py --scale small --save baseline.json
+    python benchmarks/run.py --scale small --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cases import CASES, Inputs  # noqa: E402
+
+SCALES = {
+    'small': {'n_days': 365 * 3, 'n_titles': 10, 'sparsity': .1},
+    'medium': {'n_days': 365 * 5, 'n_titles': 50, 'sparsity': .2},
+    'large': {'n_days': 365 * 10, 'n_titles': 200, 'sparsity': .3},
+}
+
+
+def measure(inputs: Inputs, setup, func, repeat: int) -> dict:
+    """
+    Time a case over many runs, then trace its peak memory over one more run.
+    The setup of each run is excluded from both measures.
+    """
+    times = []
+    for _ in range(repeat):
+        args = setup(inputs)
+        t = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - t)
+
+    args = setup(inputs)
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'time': min(times), 'median_time': statistics.median(times), 'peak_memory': peak}
+
+
+def run(scale: dict, repeat: int, only: list = None) -> dict:
+    inputs = Inputs(**scale)
+    results = {}
+    for name, (setup, func) in CASES.items():
+        if only and name not in only:
+            continue
+        results[name] = measure(inputs, setup, func, repeat)
+        print(f"{name:<28}{results[name]['time']:>12.4f}s{results[name]['peak_memory'] / 2 ** 20:>12.2f}MiB")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare results with a baseline, returning the names of the cases slower
+    or more memory hungry than the baseline by more than the threshold.
+    """
+    regressions = []
+    print(f"\n{'case':<28}{'time':>12}{'memory':>12}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        time_ratio = result['time'] / max(baseline[name]['time'], 1e-9)
+        memory_ratio = result['peak_memory'] / max(baseline[name]['peak_memory'], 1)
+        regression = time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        if regression:
+            regressions.append(name)
+        print(f"{name:<28}{time_ratio:>11.2f}x{memory_ratio:>11.2f}x{'  REGRESSION' if regression else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=SCALES, default='small', help="Size of the synthetic data.")
+    parser.add_argument('--days', type=int, help="Number of days (overrides the scale).")
+    parser.add_argument('--titles', type=int, help="Number of titles (overrides the scale).")
+    parser.add_argument('--sparsity', type=float, help="Probability of missing values (overrides the scale).")
+    parser.add_argument('--repeat', type=int, default=3, help="Number of timed runs of each case.")
+    parser.add_argument('--only', nargs='+', choices=CASES, help="Run only the given cases.")
+    parser.add_argument('--save', help="Save results to the given JSON file.")
+    parser.add_argument('--compare', help="Compare results with the given JSON baseline.")
+    parser.add_argument('--threshold', type=float, default=.2, help="Tolerated relative slowdown.")
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    for key, value in (('n_days', args.days), ('n_titles', args.titles), ('sparsity', args.sparsity)):
+        if value is not None:
+            scale[key] = value
+
+    print(f"Scale: {scale}\n")
+    results = run(scale, args.repeat, args.only)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'scale': scale, 'python': platform.python_version(), 'results': results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['scale'] != scale:
+            print(f"\nWarning: baseline scale {baseline['scale']} differs from {scale}.")
+        if compare(results, baseline['results'], args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,518 @@
+from array import array
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+from scipy.interpolate import interp1d
+
+from outatime.dataclass.time_series_data import TimeSeriesData
+from outatime.granularity.granularity import Granularity
+
+from ..granularity.utils import beginning_of_granularity
+from ..util.dictionaries import assert_named_aggregation
+from .compact_data import CompactData, CompactTimeSeriesData, TitleTable
+
+
+@dataclass
+class ColumnarData:
+    """
+    Columnar representation of a time series: a single array of dates plus,
+    for each title, a float64 column and a validity mask.
+
+    Example:
+        [TimeSeriesData(day=2022-04-14, data={'a': 1, 'b': 8}),
+        TimeSeriesData(day=2022-04-15, data={'b': 7})]
+
+        dates  -> ['2022-04-14', '2022-04-15'] (datetime64[D])
+        titles -> ['a', 'b']
+        values -> [[1., nan], [8., 7.]]
+        mask   -> [[True, False], [True, True]]
+
+    Values and mask are 2D arrays with a row for each title (in sorted order)
+    and a column for each day. Missing (or None) values are stored as NaN
+    with a False mask.
+    """
+    dates: np.ndarray
+    titles: List[str]
+    values: np.ndarray
+    mask: np.ndarray
+
+    @classmethod
+    def from_time_series_data(cls, data: Iterable[TimeSeriesData], titles: List[str] = None) -> 'ColumnarData':
+        """
+        Build the columnar representation of a sorted sequence of
+        TimeSeriesData with one-level dictionaries as data.
+
+        Args:
+            data (Iterable[TimeSeriesData]): Input time series elements.
+            titles (List[str], optional): Extract only the given titles (in
+            the given order), reading nothing else from the data. Defaults
+            to None (all titles, sorted).
+
+        Returns:
+            ColumnarData: Columnar representation of the input data.
+        """
+        if titles is not None:
+            return cls._select_titles(data, titles)
+
+        days = []
+        codes = {}
+        day_idx, title_idx, values = [], [], []
+        for i, element in enumerate(data):
+            days.append(element.day)
+            for title, value in (element.data or {}).items():
+                j = codes.setdefault(title, len(codes))
+                if value is not None:
+                    day_idx.append(i)
+                    title_idx.append(j)
+                    values.append(value)
+
+        titles = sorted(codes)
+        sorted_codes = {title: k for k, title in enumerate(titles)}
+        remap = np.array([sorted_codes[title] for title in codes], dtype=np.intp)
+        title_idx = remap[np.array(title_idx, dtype=np.intp)]
+        day_idx = np.array(day_idx, dtype=np.intp)
+
+        shape = (len(titles), len(days))
+        column_values = np.full(shape, np.nan, dtype=np.float64)
+        column_values[title_idx, day_idx] = np.array(values, dtype=np.float64)
+        mask = np.zeros(shape, dtype=bool)
+        mask[title_idx, day_idx] = True
+
+        return cls(
+            dates=np.array(days, dtype='datetime64[D]'),
+            titles=titles,
+            values=column_values,
+            mask=mask
+        )
+
+    @classmethod
+    def _select_titles(cls, data: Iterable[TimeSeriesData], titles: List[str]) -> 'ColumnarData':
+        days, rows = [], []
+        for element in data:
+            days.append(element.day)
+            element_data = element.data or {}
+            rows.append([element_data.get(title) for title in titles])
+
+        values = np.array(rows, dtype=np.float64).reshape(len(days), len(titles)).T
+        return cls(
+            dates=np.array(days, dtype='datetime64[D]'),
+            titles=list(titles),
+            values=np.ascontiguousarray(values),
+            mask=~np.isnan(values)
+        )
+
+    @classmethod
+    def from_rows(cls, dates: np.ndarray, values: np.ndarray, codes: np.ndarray, titles: List[str]) -> 'ColumnarData':
+        """
+        Build the columnar representation of long format rows, with titles
+        encoded as integer codes into a title table.
+        Rows don't need to be sorted: for the same day and title the last row
+        wins. NaN values are treated as missing.
+
+        Example:
+            dates  -> ['2022-04-15', '2022-04-14', '2022-04-14']
+            values -> [7., 1., 8.]
+            codes  -> [0, 1, 0]
+            titles -> ['b', 'a']
+
+            returns ColumnarData(
+                dates=['2022-04-14', '2022-04-15'],
+                titles=['a', 'b'],
+                values=[[1., nan], [8., 7.]],
+                mask=[[True, False], [True, True]]
+            )
+
+        Args:
+            dates (np.ndarray): Day of each row.
+            values (np.ndarray): Value of each row.
+            codes (np.ndarray): Title code of each row.
+            titles (List[str]): Title table (title of each code).
+
+        Returns:
+            ColumnarData: Columnar representation of the rows.
+        """
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        values = np.asarray(values, dtype=np.float64)
+        codes = np.asarray(codes, dtype=np.intp)
+        days, day_idx = np.unique(dates, return_inverse=True)
+
+        used = np.unique(codes)
+        order = sorted(range(len(used)), key=lambda k: titles[used[k]])
+        remap = np.zeros(len(titles), dtype=np.intp)
+        remap[used[order]] = np.arange(len(used))
+        title_idx = remap[codes]
+
+        valid = ~np.isnan(values)
+        day_idx, title_idx, values = day_idx[valid], title_idx[valid], values[valid]
+        # keep the last row of each (title, day) pair
+        key = title_idx * len(days) + day_idx
+        _, last = np.unique(key[::-1], return_index=True)
+        keep = len(key) - 1 - last
+
+        shape = (len(used), len(days))
+        column_values = np.full(shape, np.nan, dtype=np.float64)
+        column_values[title_idx[keep], day_idx[keep]] = values[keep]
+        mask = np.zeros(shape, dtype=bool)
+        mask[title_idx[keep], day_idx[keep]] = True
+
+        return cls(
+            dates=days,
+            titles=[titles[used[k]] for k in order],
+            values=column_values,
+            mask=mask
+        )
+
+    def __len__(self):
+        return len(self.dates)
+
+    def slice(self, start: int, stop: int) -> 'ColumnarData':
+        """
+        Return the columns of the days between the given positions, sharing
+        the arrays of this object (no copy).
+        """
+        return ColumnarData(
+            dates=self.dates[start:stop],
+            titles=self.titles,
+            values=self.values[:, start:stop],
+            mask=self.mask[:, start:stop]
+        )
+
+    def select(self, titles: Iterable[str]) -> 'ColumnarData':
+        """Return the columns of the given titles only (those available)."""
+        titles = set(titles)
+        rows = [i for i, title in enumerate(self.titles) if title in titles]
+        return ColumnarData(
+            dates=self.dates,
+            titles=[self.titles[i] for i in rows],
+            values=self.values[rows],
+            mask=self.mask[rows]
+        )
+
+    def between(self, start_date: date = None, end_date: date = None) -> 'ColumnarData':
+        """
+        Return the columns of the days from start_date to end_date (both
+        included, None for no bound), sharing the arrays of this object.
+        """
+        start = 0 if start_date is None else np.searchsorted(self.dates, np.datetime64(start_date, 'D'), side='left')
+        stop = len(self.dates) if end_date is None else np.searchsorted(self.dates, np.datetime64(end_date, 'D'), side='right')
+        return self.slice(int(start), int(stop))
+
+    def merge(self, other: 'ColumnarData', how: str = 'sum', intersection: bool = False) -> 'ColumnarData':
+        """
+        Merge the columns of two time series, with the days of any of them
+        (or only the shared ones if intersection is set). Each title is
+        reduced over the series that have a value for it.
+
+        Args:
+            other (ColumnarData): Columns to merge.
+            how (str, optional): 'sum', 'mean', 'max' or 'min'. Defaults to 'sum'.
+            intersection (bool, optional): Keep only shared days. Defaults to False.
+
+        Returns:
+            ColumnarData: Merged columns.
+        """
+        assert_named_aggregation(how)
+        dates = (np.intersect1d if intersection else np.union1d)(self.dates, other.dates)
+        titles = sorted(set(self.titles).union(other.titles))
+        codes = {title: i for i, title in enumerate(titles)}
+
+        values = np.full((len(titles), len(dates), 2), np.nan)
+        mask = np.zeros(values.shape, dtype=bool)
+        for k, columns in enumerate((self, other)):
+            days = np.isin(columns.dates, dates)
+            positions = np.searchsorted(dates, columns.dates[days])
+            rows = np.array([codes[title] for title in columns.titles], dtype=np.intp)
+            values[rows[:, None], positions[None, :], k] = columns.values[:, days]
+            mask[rows[:, None], positions[None, :], k] = columns.mask[:, days]
+
+        shape = (len(titles), len(dates))
+        res, counts = reduce_ranges(values.reshape(-1, 2), mask.reshape(-1, 2), np.array([0]), np.array([2]), how)
+        merged_mask = (counts > 0).reshape(shape)
+        return ColumnarData(
+            dates=dates,
+            titles=titles,
+            values=np.where(merged_mask, res.reshape(shape), np.nan),
+            mask=merged_mask
+        )
+
+    def resample(self, granularity: Granularity, how: str = 'sum', index_of_granularity: int = 0) -> 'ColumnarData':
+        """
+        Reduce the values of each title within each time step of the given
+        granularity (see TimeSeries.resample), with a day for every time
+        step from the first to the last one.
+
+        Args:
+            granularity (Granularity): Time step of the output columns.
+            how (str, optional): 'sum', 'mean', 'max' or 'min'. Defaults to 'sum'.
+            index_of_granularity (int, optional): The day of the time step
+            to pick as reference (0-indexed). Defaults to 0.
+
+        Returns:
+            ColumnarData: Resampled columns.
+        """
+        assert_named_aggregation(how)
+        if not len(self):
+            return self
+
+        steps = beginning_of_granularity(self.dates, granularity)
+        starts = np.flatnonzero(np.r_[True, steps[1:] != steps[:-1]])
+        stops = np.r_[starts[1:], len(steps)]
+        reduced, counts = reduce_ranges(self.values, self.mask, starts, stops, how)
+
+        beginnings = [steps[0].item()]
+        while beginnings[-1] < steps[-1].item():
+            beginnings.append(granularity.get_beginning_of_granularity(beginnings[-1] + granularity.delta))
+        filled = np.searchsorted(np.array(beginnings, dtype='datetime64[D]'), steps[starts])
+
+        values = np.full((len(self.titles), len(beginnings)), np.nan)
+        mask = np.zeros(values.shape, dtype=bool)
+        mask[:, filled] = counts > 0
+        values[:, filled] = np.where(mask[:, filled], reduced, np.nan)
+        days = [granularity.get_n_day_of_granularity(day=day, idx=index_of_granularity) for day in beginnings]
+        return ColumnarData(
+            dates=np.array(days, dtype='datetime64[D]'),
+            titles=list(self.titles),
+            values=values,
+            mask=mask
+        )
+
+    def interpolate(self, titles: List[str] = None, method: str = 'linear') -> 'ColumnarData':
+        """
+        Fill the missing values of the given titles on all days (see
+        TimeSeries.interpolate_all).
+
+        Args:
+            titles (List[str], optional): The values to fill. Defaults to
+            None (all titles).
+            method (str, optional): Interpolation method. Defaults to 'linear'.
+
+        Returns:
+            ColumnarData: Columns with filled values.
+        """
+        if titles is None:
+            titles = self.titles
+        assert all(title in self.titles for title in titles), "requested title is missing"
+
+        rows = [self.index_of(title) for title in titles]
+        values, mask = self.values.copy(), self.mask.copy()
+        values[rows] = interpolate_rows(values[rows], method)
+        mask[rows] = True
+        return ColumnarData(dates=self.dates, titles=list(self.titles), values=values, mask=mask)
+
+    def index_of(self, title: str) -> int:
+        """Return the row of the given title in values and mask."""
+        try:
+            return self.titles.index(title)
+        except ValueError:
+            raise KeyError(title)
+
+    def column(self, title: str) -> np.ndarray:
+        """Return the values of the given title for all days (NaN if missing)."""
+        return self.values[self.index_of(title)]
+
+    def encoded_rows(self) -> 'EncodedRows':
+        """Return the valid values in long format with encoded titles, ordered by day and title."""
+        day_idx, title_idx = np.nonzero(self.mask.T)
+        return EncodedRows(
+            dates=self.dates[day_idx],
+            values=self.values[title_idx, day_idx],
+            codes=title_idx.astype(np.int32),
+            titles=list(self.titles),
+        )
+
+    def to_time_series_data(self, compact: bool = False) -> List[TimeSeriesData]:
+        """
+        Convert the columns back to a list of TimeSeriesData.
+
+        Args:
+            compact (bool, optional): Build CompactTimeSeriesData records,
+            whose data share a single title table. Defaults to False.
+        """
+        days = self.dates.astype(object)
+        if compact:
+            table = TitleTable(self.titles)
+            rows = np.ascontiguousarray(np.where(self.mask, self.values, np.nan).T)
+            return [
+                CompactTimeSeriesData(day=day, data=CompactData.from_values(table, array('d', row.tobytes())))
+                for day, row in zip(days, rows)
+            ]
+
+        values = self.values.T.tolist()
+        mask = self.mask.T.tolist()
+        return [
+            TimeSeriesData(
+                day=day,
+                data={title: v for title, v, m in zip(self.titles, day_values, day_mask) if m}
+            )
+            for day, day_values, day_mask in zip(days, values, mask)
+        ]
+
+
+@dataclass
+class EncodedRows:
+    """
+    Long format rows of a time series with dictionary-encoded titles: a
+    date (datetime64[D]), a value (float64) and a title code (int32) for
+    each row, plus the table with the title of each code.
+
+    Example:
+        [TimeSeriesData(day=2022-04-14, data={'a': 1, 'b': 8}),
+        TimeSeriesData(day=2022-04-15, data={'b': 7})]
+
+        dates  -> ['2022-04-14', '2022-04-14', '2022-04-15']
+        values -> [1., 8., 7.]
+        codes  -> [0, 1, 1]
+        titles -> ['a', 'b']
+    """
+    dates: np.ndarray
+    values: np.ndarray
+    codes: np.ndarray
+    titles: List[str]
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_title(cls, dates: np.ndarray, values: np.ndarray, title: str) -> 'EncodedRows':
+        """Rows of a single title."""
+        return cls(
+            dates=np.asarray(dates, dtype='datetime64[D]'),
+            values=np.asarray(values, dtype=np.float64),
+            codes=np.zeros(len(dates), dtype=np.int32),
+            titles=[title],
+        )
+
+    @classmethod
+    def concatenate(cls, rows_list: List['EncodedRows']) -> 'EncodedRows':
+        """Concatenate rows, merging their title tables."""
+        titles, codes = [], {}
+        remapped = []
+        for rows in rows_list:
+            remap = np.empty(len(rows.titles), dtype=np.int32)
+            for i, title in enumerate(rows.titles):
+                if title not in codes:
+                    codes[title] = len(titles)
+                    titles.append(title)
+                remap[i] = codes[title]
+            remapped.append(remap[rows.codes])
+        return cls(
+            dates=np.concatenate([rows.dates for rows in rows_list]).astype('datetime64[D]'),
+            values=np.concatenate([rows.values for rows in rows_list]).astype(np.float64),
+            codes=np.concatenate(remapped).astype(np.int32),
+            titles=titles,
+        )
+
+    def code_of(self, title: str) -> int:
+        """Code of the given title, -1 if missing."""
+        try:
+            return self.titles.index(title)
+        except ValueError:
+            return -1
+
+    def select(self, title: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Dates and values of the rows of the given title."""
+        where = self.codes == self.code_of(title)
+        return self.dates[where], self.values[where]
+
+    def decode(self) -> np.ndarray:
+        """Return the rows as an object array of [date, value, title] rows."""
+        rows = np.empty((len(self), 3), dtype=object)
+        rows[:, 0] = self.dates.astype(object)
+        rows[:, 1] = self.values
+        rows[:, 2] = np.array(self.titles, dtype=object)[self.codes] if len(self.titles) else []
+        return rows
+
+    def day_updates(self) -> Iterator[Tuple[date, dict]]:
+        """
+        Group the rows by day, in date order: for each day, the dictionary of
+        its values by title. For the same day and title the last row wins.
+        """
+        if not len(self):
+            return
+        order = np.argsort(self.dates, kind='stable')
+        dates = self.dates[order]
+        values = self.values[order].tolist()
+        titles = np.array(self.titles, dtype=object)[self.codes[order]].tolist() if len(self.titles) else []
+
+        bounds = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+        starts, stops = np.r_[0, bounds].tolist(), np.r_[bounds, len(dates)].tolist()
+        for day, start, stop in zip(dates[starts].astype(object), starts, stops):
+            yield day, dict(zip(titles[start:stop], values[start:stop]))
+
+
+def reduce_ranges(
+        values: np.ndarray,
+        mask: np.ndarray,
+        starts: np.ndarray,
+        stops: np.ndarray,
+        method: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduces the valid values of each row within each [start, stop) range of
+    columns with the given named reduction. Ranges must be non-empty and
+    sorted without overlaps.
+
+    Args:
+        values (np.ndarray): 2D array of values (titles x days).
+        mask (np.ndarray): 2D validity mask of values.
+        starts (np.ndarray): First column of each range.
+        stops (np.ndarray): Column following the last one of each range.
+        method (str): One of 'sum', 'mean', 'max' and 'min'.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Reduced values (titles x ranges) and
+        number of valid values reduced in each cell.
+    """
+    assert_named_aggregation(method)
+
+    # one trailing padding column keeps every stop a valid reduceat index;
+    # odd positions reduce the gaps between ranges and are dropped
+    indices = np.empty(2 * len(starts), dtype=np.intp)
+    indices[0::2] = starts
+    indices[1::2] = stops
+
+    def _reduceat(ufunc, array, fill):
+        padded = np.full((array.shape[0], array.shape[1] + 1), fill, dtype=array.dtype)
+        padded[:, :-1] = array
+        return ufunc.reduceat(padded, indices, axis=1)[:, 0::2]
+
+    counts = _reduceat(np.add, mask.astype(np.intp), 0)
+    if method in ('sum', 'mean'):
+        res = _reduceat(np.add, np.where(mask, values, 0.), 0.)
+        if method == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                res = res / counts
+    elif method == 'max':
+        res = _reduceat(np.maximum, np.where(mask, values, -np.inf), -np.inf)
+    else:
+        res = _reduceat(np.minimum, np.where(mask, values, np.inf), np.inf)
+    return res, counts
+
+
+def interpolate_rows(values: np.ndarray, method: str = 'linear') -> np.ndarray:
+    """
+    Fill the NaN values of each row of a 2D array, interpolating on the
+    positions of the columns. Rows sharing the same missing positions are
+    interpolated with a single call.
+
+    Args:
+        values (np.ndarray): 2D array of values, overwritten with the result.
+        method (str, optional): Interpolation method. Defaults to 'linear'.
+
+    Returns:
+        np.ndarray: The filled array.
+    """
+    x = np.arange(0, values.shape[1])
+    not_nan = ~np.isnan(values)
+
+    groups = {}
+    for i, row in enumerate(not_nan):
+        groups.setdefault(row.tobytes(), []).append(i)
+
+    for group in groups.values():
+        not_nan_x = not_nan[group[0]]
+        interpol_f = interp1d(x=x[not_nan_x], y=values[group][:, not_nan_x], kind=method, axis=1)
+        values[group] = interpol_f(x)
+    return values
@@ -0,0 +1,128 @@
+import sys
+from array import array
+from collections.abc import MutableMapping
+from math import nan
+from typing import Iterable
+
+from outatime.dataclass.time_series_data import TimeSeriesData
+
+
+class TitleTable:
+    """
+    Titles of a time series with their ids, shared by all its compact
+    records: each title string is stored (and interned) once per series.
+    Titles are only added, so ids never change.
+    """
+    __slots__ = ('titles', 'ids')
+
+    def __init__(self, titles: Iterable[str] = ()):
+        self.titles = []
+        self.ids = {}
+        for title in titles:
+            self.id_of(title)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def __reduce__(self):
+        return self.__class__, (self.titles,)
+
+    def id_of(self, title: str) -> int:
+        """Return the id of the given title, adding it to the table if missing."""
+        try:
+            return self.ids[title]
+        except KeyError:
+            if isinstance(title, str):
+                title = sys.intern(title)
+            self.ids[title] = len(self.titles)
+            self.titles.append(title)
+            return self.ids[title]
+
+
+class CompactData(MutableMapping):
+    """
+    Dictionary-like data of a day, storing values as float64 in an array
+    indexed by the ids of a shared TitleTable instead of keeping its own
+    dictionary of titles.
+
+    Missing titles are stored as NaN: writing None or NaN to a title
+    removes it. Only numeric values can be stored, and they are read back
+    as floats.
+
+    Example:
+        table = TitleTable(['a', 'b'])
+
+        CompactData(table, {'b': 8}) behaves as {'b': 8.} and stores [nan, 8.]
+
+    Copies of compact data are plain dictionaries.
+    """
+    __slots__ = ('_table', '_values')
+
+    def __init__(self, table: TitleTable, data: dict = None):
+        self._table = table
+        self._values = array('d')
+        if data:
+            self.update(data)
+
+    @classmethod
+    def from_values(cls, table: TitleTable, values: array) -> 'CompactData':
+        """Wrap an array of values indexed by the ids of the given table (NaN if missing)."""
+        data = cls.__new__(cls)
+        data._table = table
+        data._values = values
+        return data
+
+    @property
+    def table(self) -> TitleTable:
+        return self._table
+
+    def __getitem__(self, key):
+        i = self._table.ids.get(key)
+        if i is None or i >= len(self._values):
+            raise KeyError(key)
+        value = self._values[i]
+        if value != value:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        i = self._table.id_of(key)
+        values = self._values
+        if i >= len(values):
+            values.extend([nan] * (i + 1 - len(values)))
+        values[i] = nan if value is None else value
+
+    def __delitem__(self, key):
+        self[key]
+        self._values[self._table.ids[key]] = nan
+
+    def __iter__(self):
+        titles = self._table.titles
+        return (titles[i] for i, value in enumerate(self._values) if value == value)
+
+    def __len__(self):
+        return sum(1 for value in self._values if value == value)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return self.__class__.from_values, (self._table, self._values)
+
+    def copy(self) -> dict:
+        return dict(self)
+
+
+class CompactTimeSeriesData(TimeSeriesData):
+    """
+    TimeSeriesData storing its day and data in slots, usually with
+    CompactData as data: the instance dictionary inherited from the base
+    dataclass stays empty. Equal to any TimeSeriesData with the same day and
+    equal data.
+    """
+    __slots__ = ('day', 'data')
+
+    def __eq__(self, other):
+        if not isinstance(other, TimeSeriesData):
+            return NotImplemented
+        return self.day == other.day and self.data == other.data
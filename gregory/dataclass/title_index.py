@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from outatime.dataclass.time_series_data import TimeSeriesData
+
+
+@dataclass
+class TitleEntry:
+    """
+    Entry of the title index: sorted positions of the days where a title is
+    present and its values there (float64, NaN for None values, or object
+    if not numeric).
+    """
+    positions: np.ndarray
+    values: np.ndarray
+
+    def __len__(self):
+        return len(self.positions)
+
+    def valid(self) -> np.ndarray:
+        """Mask of the values that are not None (or NaN)."""
+        if self.values.dtype == object:
+            return np.array([v is not None for v in self.values], dtype=bool)
+        return ~np.isnan(self.values)
+
+
+def _values_array(values: list) -> np.ndarray:
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array(values, dtype=object)
+
+
+def index_titles(data: Iterable[TimeSeriesData], titles: Iterable[str] = None) -> Dict[str, TitleEntry]:
+    """
+    Build the inverted index of a sorted sequence of TimeSeriesData: for
+    each title, the positions of the days where it is present and its
+    values there.
+
+    Example:
+        [TimeSeriesData(day=2022-04-14, data={'a': 1, 'b': 8}),
+        TimeSeriesData(day=2022-04-15, data={'b': 7})]
+
+        returns {
+            'a': TitleEntry(positions=[0], values=[1.]),
+            'b': TitleEntry(positions=[0, 1], values=[8., 7.])
+        }
+
+    Args:
+        data (Iterable[TimeSeriesData]): Input time series elements.
+        titles (Iterable[str], optional): Index only the given titles.
+        Defaults to None (all titles).
+
+    Returns:
+        Dict[str, TitleEntry]: Entry of each title present in the data.
+    """
+    positions: Dict[str, List[int]] = {}
+    values: Dict[str, list] = {}
+    if titles is None:
+        for i, element in enumerate(data):
+            for title, value in (element.data or {}).items():
+                if title not in positions:
+                    positions[title], values[title] = [], []
+                positions[title].append(i)
+                values[title].append(value)
+    else:
+        titles = list(titles)
+        for i, element in enumerate(data):
+            element_data = element.data or {}
+            for title in titles:
+                if title in element_data:
+                    if title not in positions:
+                        positions[title], values[title] = [], []
+                    positions[title].append(i)
+                    values[title].append(element_data[title])
+
+    return {
+        title: TitleEntry(positions=np.array(positions[title], dtype=np.intp), values=_values_array(values[title]))
+        for title in positions
+    }
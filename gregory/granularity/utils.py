@@ -1 +1,94 @@
+import numpy as np
+
 from outatime.granularity.utils import *
+from outatime.granularity.granularity import *
+
+
+def beginning_of_granularity(dates: np.ndarray, granularity: Granularity) -> np.ndarray:
+    """
+    Move each of the given dates to the beginning of its granularity period.
+    Standard granularities are computed on the whole array with datetime64
+    arithmetic; any other granularity is evaluated once per distinct date.
+
+    Example:
+        (with a Monthly granularity)
+        dates = ['2022-04-16', '2022-05-02']
+        returns ['2022-04-01', '2022-05-01']
+
+    Args:
+        dates (np.ndarray): Input dates (datetime64[D] or dates).
+        granularity (Granularity): Granularity of the periods.
+
+    Returns:
+        np.ndarray: First day of the granularity step of each date (datetime64[D]).
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    kind = type(granularity)
+    if kind is DailyGranularity:
+        return dates
+    if kind is WeeklyGranularity:
+        # 1970-01-01 was a Thursday
+        return dates - (dates.astype(np.int64) + 3) % 7
+    if kind is MonthlyGranularity:
+        return dates.astype('datetime64[M]').astype('datetime64[D]')
+    if kind is QuarterlyGranularity:
+        months = dates.astype('datetime64[M]').astype(np.int64)
+        return (months - months % 3).astype('datetime64[M]').astype('datetime64[D]')
+    if kind is YearlyGranularity:
+        return dates.astype('datetime64[Y]').astype('datetime64[D]')
+
+    unique, inverse = np.unique(dates, return_inverse=True)
+    beginnings = [granularity.get_beginning_of_granularity(day) for day in unique.astype(object)]
+    return np.array(beginnings, dtype='datetime64[D]')[inverse]
+
+
+def infer_granularity(dates: np.ndarray, granularity_list: list) -> Granularity:
+    """
+    Infer the granularity of an array of distinct dates: the largest
+    granularity of the list whose periods contain at most one of the dates.
+
+    Args:
+        dates (np.ndarray): Input dates (datetime64[D] or dates).
+        granularity_list (list): Candidate granularity classes.
+
+    Returns:
+        Granularity: Inferred granularity, None if there are less than two dates.
+    """
+    if len(dates) < 2:
+        return None
+
+    for granularity in sorted(granularity_list, key=lambda gr: gr.delta, reverse=True):
+        g = granularity()
+        if len(np.unique(beginning_of_granularity(dates, g))) == len(dates):
+            return g
+
+    raise Exception("Unexpected granularity found in time series data.")
+
+
+def subtract_delta(dates: np.ndarray, delta: relativedelta) -> np.ndarray:
+    """
+    Subtract a relative delta (years, months and days) from each of the
+    given dates with datetime64 arithmetic, clipping days to the end of the
+    month as relativedelta does.
+
+    Example:
+        dates = ['2022-03-31', '2022-04-16']
+        delta = relativedelta(months=1)
+        returns ['2022-02-28', '2022-03-16']
+
+    Args:
+        dates (np.ndarray): Input dates (datetime64[D] or dates).
+        delta (relativedelta): Delta to subtract.
+
+    Returns:
+        np.ndarray: Shifted dates (datetime64[D]).
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    months = delta.years * 12 + delta.months
+    if months:
+        month = dates.astype('datetime64[M]')
+        day_of_month = (dates - month.astype('datetime64[D]')).astype(np.int64)
+        month = month - months
+        month_length = ((month + 1).astype('datetime64[D]') - month.astype('datetime64[D]')).astype(np.int64)
+        dates = month.astype('datetime64[D]') + np.minimum(day_of_month, month_length - 1)
+    return dates - delta.days
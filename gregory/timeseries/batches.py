@@ -1,21 +1,95 @@
-from typing import List
+from datetime import date
+from functools import partial
+from typing import Iterator, List, Tuple
 
+import numpy as np
 from outatime.granularity.granularity import Granularity, WeeklyGranularity
+from outatime.granularity.utils import get_first_available_beginning
 from outatime.timeseries.batches import aggregate as aggregate_
-from outatime.timeseries.batches import split as split_
 from outatime.timeseries.batches import pick_a_day as pick_a_day_
 from outatime.timeseries.batches import pick_a_weekday as pick_a_weekday_
 
+from ..dataclass.columnar_data import reduce_ranges
+from ..dataclass.time_series_data import TimeSeriesData
 from ..timeseries.time_series import TimeSeries
 from ..util.decorators import as_gregory_ts
-from ..util.dictionaries import aggregate_dicts
+from ..util.dictionaries import aggregate_dicts, assert_named_aggregation
+from ..util.instrumentation import instrumented
 
 
 def default_aggregation(x):
     return aggregate_dicts(x, method=sum)
 
 
-@as_gregory_ts
+def iter_batches(
+        ts: TimeSeries,
+        granularity: Granularity = WeeklyGranularity(),
+        first_day_of_batch: int = 0,
+        last_day_of_batch: int = -1,
+        drop_tails: bool = False
+) -> Iterator[Tuple[date, date]]:
+    """
+    Yields the first and last day of each batch (time step of the given
+    granularity) covering the input time series, with the same delimiters
+    used by aggregate and split.
+
+    Args:
+        ts (TimeSeries): Input time series.
+        granularity (Granularity, optional): Time step to use to divide the
+        input series. Defaults to WeeklyGranularity().
+        first_day_of_batch (int, optional): The day of the time step to use as
+        first delimiter (0-indexed). Defaults to 0.
+        last_day_of_batch (int, optional): The day of the time step to use as
+        last delimiter (0-indexed). Defaults to -1.
+        drop_tails (bool, optional): Choose to remove initial and final days if
+        the granularity step is not complete.
+
+    Returns:
+        Iterator[Tuple[date, date]]: First and last day of each batch.
+    """
+    end_date = ts.end_date if drop_tails else granularity.get_end_of_granularity(ts.end_date)
+
+    if drop_tails:
+        start_date = get_first_available_beginning(
+            day=ts.start_date,
+            input_granularity=ts.data_granularity,
+            output_granularity=granularity
+        )
+    else:
+        start_date = ts.start_date
+
+    batch_beginning = granularity.get_n_day_of_granularity(start_date, first_day_of_batch)
+    batch_end = granularity.get_n_day_of_granularity(day=batch_beginning, idx=last_day_of_batch)
+
+    while batch_end <= end_date:
+        yield batch_beginning, batch_end
+
+        batch_beginning += granularity.delta
+        batch_beginning = granularity.get_n_day_of_granularity(batch_beginning, first_day_of_batch)
+        batch_end = granularity.get_n_day_of_granularity(day=batch_beginning, idx=last_day_of_batch)
+
+
+def batch_delimiters(dates: np.ndarray, batches: List[Tuple[date, date]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds, for each batch, the index of its first day in the given sorted
+    dates and the index following its last day.
+
+    Args:
+        dates (np.ndarray): Sorted datetime64[D] array.
+        batches (List[Tuple[date, date]]): First and last day of each batch.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Start and stop indexes of each batch.
+    """
+    beginnings = np.array([beginning for beginning, _ in batches], dtype='datetime64[D]')
+    ends = np.array([end for _, end in batches], dtype='datetime64[D]')
+    return np.searchsorted(dates, beginnings, side='left'), np.searchsorted(dates, ends, side='right')
+
+
+_aggregate = as_gregory_ts(aggregate_)
+
+
+@instrumented
 def aggregate(
         ts: TimeSeries,
         method=default_aggregation,
@@ -25,9 +99,66 @@ def aggregate(
         drop_tails: bool = False,
         store_day_of_batch: int = 0,
 ) -> TimeSeries:
-    return aggregate_(ts, method, granularity, first_day_of_batch, last_day_of_batch, drop_tails, store_day_of_batch)
+    """
+    Divides the input time series in many sub-sets for each contained time step
+    of the given granularity. Then aggregates each sub-set data into a single
+    TimeSeriesData to generate a new TimeSeries output.
+
+    Named reductions ('sum', 'mean', 'max' or 'min') are computed on the
+    columnar view of the series, reducing each title over all batches at
+    once and ignoring missing values; aggregated values are returned as
+    floats. Any other method is applied to the list of data of each batch.
 
+    Args:
+        ts (TimeSeries): Input time series.
+        method (optional): Aggregation function to apply or name of a
+        reduction to apply to each title. Defaults to the sum of each title.
+        granularity (Granularity, optional): Time step to use to divide the
+        input series. Defaults to WeeklyGranularity().
+        first_day_of_batch (int, optional): The day of the time step to use as
+        first delimiter (0-indexed). Defaults to 0.
+        last_day_of_batch (int, optional): The day of the time step to use as
+        last delimiter (0-indexed). Defaults to -1.
+        drop_tails (bool, optional): Choose to remove initial and final days if
+        the granularity step is not complete.
+        store_day_of_batch (int, optional): The day of the time step to store
+        aggregated data into (0-indexed). Defaults to 0.
 
+    Returns:
+        TimeSeries: A new time series with aggregated values.
+    """
+    if not isinstance(method, str):
+        return _aggregate(ts, method, granularity, first_day_of_batch, last_day_of_batch, drop_tails, store_day_of_batch)
+
+    assert_named_aggregation(method)
+    assert first_day_of_batch >= 0, "'first_day_of_batch' can't be lesser than 0."
+    assert last_day_of_batch >= -1 and last_day_of_batch != 0, "'last_day_of_batch' can't be lesser than -1 or equal to 0."
+    assert store_day_of_batch >= -1, "'store_day_of_batch' can't be lesser than -1."
+    assert ts.data_granularity.delta <= granularity.delta, "Can't shrink the time series to a lower level granularity."
+
+    columns = ts.columns
+    batches = list(iter_batches(ts, granularity, first_day_of_batch, last_day_of_batch, drop_tails))
+    starts, stops = batch_delimiters(columns.dates, batches)
+    not_empty = stops > starts
+    if not not_empty.any():
+        return TimeSeries()
+
+    res, counts = reduce_ranges(columns.values, columns.mask, starts[not_empty], stops[not_empty], method)
+
+    reference_days = [
+        granularity.get_n_day_of_granularity(day=beginning, idx=store_day_of_batch)
+        for (beginning, _), keep in zip(batches, not_empty) if keep
+    ]
+    return TimeSeries([
+        TimeSeriesData(
+            day=day,
+            data={title: v for title, v, c in zip(columns.titles, batch_values, batch_counts) if c}
+        )
+        for day, batch_values, batch_counts in zip(reference_days, res.T.tolist(), counts.T.tolist())
+    ])
+
+
+@instrumented
 @as_gregory_ts
 def pick_a_day(
         ts: TimeSeries,
@@ -40,6 +171,7 @@ def pick_a_day(
     return pick_a_day_(ts, granularity, day_of_batch, default=default)
 
 
+@instrumented
 @as_gregory_ts
 def pick_a_weekday(
         ts: TimeSeries,
@@ -53,7 +185,46 @@ def pick_a_weekday(
     return pick_a_weekday_(ts, granularity, day_of_batch, weekday, default=default)
 
 
-@as_gregory_ts
+def iter_split(
+        ts: TimeSeries,
+        granularity: Granularity = WeeklyGranularity(),
+        first_day_of_batch: int = 0,
+        last_day_of_batch: int = -1,
+        drop_tails: bool = False
+) -> Iterator[TimeSeries]:
+    """
+    Yields, one at a time, the sub-sets of the input time series for each
+    contained time step of the given granularity (see split).
+
+    Args:
+        ts (TimeSeries): Input time series.
+        granularity (Granularity, optional): Time step to use to divide the
+        input series. Defaults to WeeklyGranularity().
+        first_day_of_batch (int, optional): The day of the time step to use as
+        first delimiter (0-indexed). Defaults to 0.
+        last_day_of_batch (int, optional): The day of the time step to use as
+        last delimiter (0-indexed). Defaults to -1.
+        drop_tails (bool, optional): Choose to remove initial and final days if
+        the granularity step is not complete.
+
+    Returns:
+        Iterator[TimeSeries]: Smaller time series, sharing the elements of
+        the input one.
+    """
+    assert first_day_of_batch >= 0, "'first_day_of_batch' can't be lesser than 0."
+    assert last_day_of_batch >= -1 and last_day_of_batch != 0, "'last_day_of_batch' can't be lesser than -1 or equal to 0."
+    assert ts.data_granularity.delta <= granularity.delta, "Can't shrink the time series to a lower level granularity."
+
+    # outatime time series are viewed as gregory ones
+    view = ts.view if isinstance(ts, TimeSeries) else partial(TimeSeries.view, ts)
+    batches = list(iter_batches(ts, granularity, first_day_of_batch, last_day_of_batch, drop_tails))
+    starts, stops = batch_delimiters(np.array(ts.dates, dtype='datetime64[D]'), batches)
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        if stop > start:
+            yield view(start, stop)
+
+
+@instrumented
 def split(
         ts: TimeSeries,
         granularity: Granularity = WeeklyGranularity(),
@@ -61,4 +232,27 @@ def split(
         last_day_of_batch: int = -1,
         drop_tails: bool = False
 ) -> List[TimeSeries]:
-    return split_(ts, granularity, first_day_of_batch, last_day_of_batch, drop_tails)
+    """
+    Divides the input time series in many sub-sets for each contained time step
+    of the given granularity.
+
+    Sub-sets are views of the input time series (see TimeSeries.view): they
+    share its elements instead of copying them, and inherit its data
+    granularity. Writing through a sub-set also clears the cached data of
+    the input time series.
+
+    Args:
+        ts (TimeSeries): Input time series.
+        granularity (Granularity, optional): Time step to use to divide the
+        input series. Defaults to WeeklyGranularity().
+        first_day_of_batch (int, optional): The day of the time step to use as
+        first delimiter (0-indexed). Defaults to 0.
+        last_day_of_batch (int, optional): The day of the time step to use as
+        last delimiter (0-indexed). Defaults to -1.
+        drop_tails (bool, optional): Choose to remove initial and final days if
+        the granularity step is not complete.
+
+    Returns:
+        List[TimeSeries]: A list of smaller time series.
+    """
+    return list(iter_split(ts, granularity, first_day_of_batch, last_day_of_batch, drop_tails))
@@ -1,17 +1,24 @@
+from datetime import date
 from functools import reduce
-from typing import List, Callable, Any, Dict
+from heapq import merge
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Callable, Any, Dict, Iterable, Iterator, Optional, Tuple
 
 from outatime.timeseries.expr import union as union_, intersection as intersection_
 from gregory.timeseries.time_series import TimeSeries
 from gregory.dataclass.time_series_data import TimeSeriesData
 from gregory.util.decorators import as_gregory_ts
+from gregory.util.instrumentation import instrumented
 
 
+@instrumented
 @as_gregory_ts
 def union(tsl_a: TimeSeries, tsl_b: TimeSeries, conflict_method: Callable[[Dict, Dict], Dict]) -> TimeSeries:
     return union_(tsl_a, tsl_b, conflict_method)
 
 
+@instrumented
 @as_gregory_ts
 def intersection(tsl_a: TimeSeries, tsl_b: TimeSeries, conflict_method: Callable[[Dict, Dict], Dict]) -> TimeSeries:
     return intersection_(tsl_a, tsl_b, conflict_method)
@@ -63,6 +70,95 @@ def union_dates(dates: list) -> list:
     return _union_dates
 
 
+def _cursor(ts: Iterable[TimeSeriesData], position: int) -> Iterator[Tuple[date, int, TimeSeriesData]]:
+    for element in ts:
+        yield element.day, position, element
+
+
+def merge_days(
+        ts_list: List[Iterable[TimeSeriesData]]
+) -> Iterator[Tuple[date, List[Optional[TimeSeriesData]]]]:
+    """
+    Streaming k-way merge of sorted time series. For each day found in any
+    of the inputs (in ascending order), yields the day and the list of the
+    elements of every input for that day (None where the day is missing).
+
+    Example:
+        ts_list = [
+            [TimeSeriesData(day=2022-04-14, data={'a': 1}),
+            TimeSeriesData(day=2022-04-15, data={'a': 2})],
+            [TimeSeriesData(day=2022-04-15, data={'a': 3})]
+        ]
+
+        yields (2022-04-14, [TimeSeriesData(day=2022-04-14, data={'a': 1}), None])
+        yields (2022-04-15, [TimeSeriesData(day=2022-04-15, data={'a': 2}),
+                             TimeSeriesData(day=2022-04-15, data={'a': 3})])
+
+    Args:
+        ts_list (List[Iterable[TimeSeriesData]]): Input list of time series,
+        or of any iterables of TimeSeriesData sorted by day.
+
+    Returns:
+        Iterator[Tuple[date, List[Optional[TimeSeriesData]]]]: Days with the
+        matching elements of each input.
+    """
+    n_series = len(ts_list)
+    cursors = [_cursor(ts, i) for i, ts in enumerate(ts_list)]
+    for day, items in groupby(merge(*cursors), key=itemgetter(0)):
+        group = [None] * n_series
+        for _, i, element in items:
+            group[i] = element
+        yield day, group
+
+
+def iter_list_intersection(
+        ts_list: List[Iterable[TimeSeriesData]],
+        conflict_method: Callable[[List[Dict]], Dict]
+) -> Iterator[TimeSeriesData]:
+    """
+    Generator form of list_intersection: yields the elements of the
+    resulting time series one at a time, in ascending order of day.
+
+    Args:
+        ts_list (List[Iterable[TimeSeriesData]]): Input list of time series.
+        conflict_method (Callable[[List[Dict]], Dict]): Method to apply
+        when choosing data for matching days.
+
+    Returns:
+        Iterator[TimeSeriesData]: Elements of shared days.
+    """
+    for day, group in merge_days(ts_list):
+        if all(element is not None for element in group):
+            yield TimeSeriesData(
+                day=day,
+                data=conflict_method([element.data for element in group])
+            )
+
+
+def iter_list_union(
+        ts_list: List[Iterable[TimeSeriesData]],
+        conflict_method: Callable[[List[Dict]], Dict]
+) -> Iterator[TimeSeriesData]:
+    """
+    Generator form of list_union: yields the elements of the resulting time
+    series one at a time, in ascending order of day.
+
+    Args:
+        ts_list (List[Iterable[TimeSeriesData]]): Input list of time series.
+        conflict_method (Callable[[List[Dict]], Dict]): Method to apply
+        when choosing data for matching days (None for missing days).
+
+    Returns:
+        Iterator[TimeSeriesData]: Elements of all days.
+    """
+    for day, group in merge_days(ts_list):
+        yield TimeSeriesData(
+            day=day,
+            data=conflict_method([element.data if element is not None else None for element in group])
+        )
+
+
+@instrumented
 def list_intersection(ts_list: List[TimeSeries], conflict_method: Callable[[List[Dict]], Dict]) -> TimeSeries:
     """
     Given a list of time series, generates a new time series with only shared
@@ -76,20 +172,10 @@ def list_intersection(ts_list: List[TimeSeries], conflict_method: Callable[[List
     Returns:
         TimeSeries: Output timeseries with shared days.
     """
-    dates_list = get_list_of_dates(ts_list)
-    int_dates = intersection_dates(dates_list)
-
-    intersection_result = []
-    for int_date in int_dates:
-        intersection_result.append(
-            TimeSeriesData(
-                day=int_date,
-                data=conflict_method([tsl.get(day=int_date).data for tsl in ts_list])
-            )
-        )
-    return TimeSeries(intersection_result)
+    return TimeSeries(list(iter_list_intersection(ts_list, conflict_method)))
 
 
+@instrumented
 def list_union(ts_list: List[TimeSeries], conflict_method: Callable[[List[Dict]], Dict]) -> TimeSeries:
     """
     Given a list of time series, generates a new time series with the union of
@@ -103,15 +189,4 @@ def list_union(ts_list: List[TimeSeries], conflict_method: Callable[[List[Dict]]
     Returns:
         TimeSeries: Output timeseries with all days.
     """
-    dates_list = get_list_of_dates(ts_list)
-    uni_dates = union_dates(dates_list)
-
-    union_result = []
-    for uni_date in uni_dates:
-        union_result.append(
-            TimeSeriesData(
-                day=uni_date,
-                data=conflict_method([tsl.get(day=uni_date).data for tsl in ts_list])
-            )
-        )
-    return TimeSeries(union_result)
+    return TimeSeries(list(iter_list_union(ts_list, conflict_method)))
@@ -0,0 +1,201 @@
+import csv
+import json
+import os
+from itertools import islice
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from outatime.granularity.granularity import Granularity
+
+from ..dataclass.columnar_data import ColumnarData
+from ..granularity.utils import beginning_of_granularity
+from ..util.instrumentation import instrumented
+from .time_series import ColumnarTimeSeries, TimeSeries
+
+FILE_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+def _encode_titles(raw_titles: list, titles: list, codes: dict) -> np.ndarray:
+    """Encode a chunk of titles as codes into the (growing) title table."""
+    unique, inverse = np.unique(np.array(raw_titles, dtype=object), return_inverse=True)
+    table = np.empty(len(unique), dtype=np.int32)
+    for i, title in enumerate(unique):
+        if title not in codes:
+            codes[title] = len(titles)
+            titles.append(title)
+        table[i] = codes[title]
+    return table[inverse]
+
+
+def _csv_chunks(f, chunk_size: int, keys: Tuple[str, str, str]):
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    positions = [header.index(key) for key in keys]
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            return
+        # blank or short lines are skipped
+        columns = list(zip(*(row for row in rows if len(row) == len(header)))) or [()] * len(header)
+        raw_values = np.array(columns[positions[2]])
+        raw_values = np.where(raw_values == '', 'nan', raw_values)
+        yield (
+            np.array(columns[positions[0]], dtype='datetime64[D]'),
+            raw_values.astype(np.float64),
+            columns[positions[1]],
+        )
+
+
+def _jsonl_chunks(f, chunk_size: int, keys: Tuple[str, str, str]):
+    date_key, title_key, value_key = keys
+    while True:
+        lines = list(islice(f, chunk_size))
+        if not lines:
+            return
+        records = [json.loads(line) for line in lines if line.strip()]
+        yield (
+            np.array([record[date_key] for record in records], dtype='datetime64[D]'),
+            np.array([record.get(value_key) for record in records], dtype=np.float64),
+            [record[title_key] for record in records],
+        )
+
+
+def iter_chunks(
+        path: str,
+        chunk_size: int = 100000,
+        file_format: str = None,
+        date_key: str = 'date',
+        title_key: str = 'title',
+        value_key: str = 'value',
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]]:
+    """
+    Read a long format file (a row for each date, title and value) in chunks
+    of fixed size. Dates and values of each chunk are parsed at once, and
+    titles are encoded as codes into a title table shared by all chunks.
+    Missing values (empty fields or nulls) are read as NaN.
+
+    Example:
+        date,title,value
+        2022-04-14,a,1
+        2022-04-14,b,8
+        2022-04-15,b,7
+
+        yields (
+            ['2022-04-14', '2022-04-14', '2022-04-15'],
+            [1., 8., 7.],
+            [0, 1, 1],
+            ['a', 'b']
+        )
+
+    Args:
+        path (str): Input file path (CSV with header or JSON lines).
+        chunk_size (int, optional): Number of rows of each chunk. Defaults to 100000.
+        file_format (str, optional): 'csv' or 'jsonl'. Defaults to None
+        (inferred by the file extension).
+        date_key (str, optional): Column (or key) of dates. Defaults to 'date'.
+        title_key (str, optional): Column (or key) of titles. Defaults to 'title'.
+        value_key (str, optional): Column (or key) of values. Defaults to 'value'.
+
+    Returns:
+        Iterator: Arrays of dates (datetime64[D]), values (float64) and title
+        codes (int32) of each chunk, and the title table (the same list for
+        all chunks, growing with new titles).
+    """
+    assert chunk_size > 0, "'chunk_size' must be greater than 0."
+    if file_format is None:
+        file_format = FILE_FORMATS.get(os.path.splitext(path)[1].lower())
+    assert file_format in FILE_FORMATS.values(), \
+        f"""Unsupported file format. Available choices are '{"', '".join(sorted(set(FILE_FORMATS.values())))}'."""
+
+    parse_chunks = _csv_chunks if file_format == 'csv' else _jsonl_chunks
+    titles, codes = [], {}
+    with open(path, newline='' if file_format == 'csv' else None) as f:
+        for dates, values, raw_titles in parse_chunks(f, chunk_size, (date_key, title_key, value_key)):
+            yield dates, values, _encode_titles(raw_titles, titles, codes), titles
+
+
+@instrumented
+def read_long(path: str, chunk_size: int = 100000, file_format: str = None, **keys) -> TimeSeries:
+    """
+    Load a long format file into a time series, reading it in chunks.
+    Only compact arrays of dates, values and title codes are kept while
+    reading, and the resulting series is columnar: its TimeSeriesData
+    elements are built only when accessed (see ColumnarTimeSeries).
+    For the same day and title the last row wins; missing values are skipped.
+
+    Args:
+        path (str): Input file path (CSV with header or JSON lines).
+        chunk_size (int, optional): Number of rows of each chunk. Defaults to 100000.
+        file_format (str, optional): 'csv' or 'jsonl'. Defaults to None
+        (inferred by the file extension).
+        **keys: Column names of dates, titles and values (see iter_chunks).
+
+    Returns:
+        TimeSeries: Time series with the data of the file.
+    """
+    dates, values, codes, titles = [], [], [], []
+    for chunk_dates, chunk_values, chunk_codes, titles in iter_chunks(path, chunk_size, file_format, **keys):
+        dates.append(chunk_dates)
+        values.append(chunk_values)
+        codes.append(chunk_codes)
+    return _from_chunks(dates, values, codes, titles)
+
+
+def iter_periods(
+        path: str,
+        granularity: Granularity,
+        chunk_size: int = 100000,
+        file_format: str = None,
+        **keys,
+) -> Iterator[TimeSeries]:
+    """
+    Read a long format file sorted by date in chunks, yielding a partial time
+    series for each period of the given granularity as soon as it is
+    complete. Only the rows of the current period are kept in memory.
+
+    Example:
+        (with a Monthly granularity)
+        rows from 2022-01-01 to 2022-03-31
+
+        yields the time series of January, February and March
+
+    Args:
+        path (str): Input file path (CSV with header or JSON lines).
+        granularity (Granularity): Granularity of the periods.
+        chunk_size (int, optional): Number of rows of each chunk. Defaults to 100000.
+        file_format (str, optional): 'csv' or 'jsonl'. Defaults to None
+        (inferred by the file extension).
+        **keys: Column names of dates, titles and values (see iter_chunks).
+
+    Returns:
+        Iterator[TimeSeries]: Time series of each period.
+    """
+    pending, current, titles = [], None, []
+    for dates, values, codes, titles in iter_chunks(path, chunk_size, file_format, **keys):
+        # chunks of blank lines only
+        if not len(dates):
+            continue
+        periods = beginning_of_granularity(dates, granularity)
+        assert np.all(periods[1:] >= periods[:-1]) and (current is None or periods[0] >= current), \
+            "Input rows must be sorted by date."
+
+        bounds = np.flatnonzero(periods[1:] != periods[:-1]) + 1
+        for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(dates)]):
+            if current is not None and periods[start] != current:
+                yield _from_chunks(*zip(*pending), titles)
+                pending = []
+            current = periods[start]
+            pending.append((dates[start:stop], values[start:stop], codes[start:stop]))
+
+    if pending:
+        yield _from_chunks(*zip(*pending), titles)
+
+
+def _from_chunks(dates: list, values: list, codes: list, titles: List[str]) -> TimeSeries:
+    if not dates:
+        return TimeSeries()
+    columns = ColumnarData.from_rows(np.concatenate(dates), np.concatenate(values), np.concatenate(codes), titles)
+    return ColumnarTimeSeries(columns)
@@ -0,0 +1,215 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import List, Tuple, Union
+
+from outatime.granularity.granularity import Granularity
+
+from ..dataclass.columnar_data import ColumnarData
+from ..util.instrumentation import instrumented
+from .time_series import ColumnarTimeSeries, TimeSeries
+
+Step = Tuple[str, dict]
+
+MERGES = ('union', 'intersection')
+
+# steps that a title selection can be moved before, as they work on each title separately
+PER_TITLE = MERGES + ('between', 'resample', 'interpolate')
+
+
+class LazyTimeSeries:
+    """
+    Plan of operations on a time series, built by chaining calls on
+    TimeSeries.lazy() and run by collect.
+
+    Before running, the plan is optimized (see optimize):
+        * consecutive title selections, date ranges and interpolations are
+        fused into a single step;
+        * title selections are moved as early as possible, and both title
+        selections and date ranges are pushed down into both inputs of
+        unions and intersections;
+        * leading selections and date ranges are applied while extracting
+        the columns of the source series, reading only the needed data.
+
+    All steps then run on columnar arrays (see ColumnarData): no
+    intermediate TimeSeries is built, and the elements of the result are
+    built only when accessed (see ColumnarTimeSeries).
+
+    Example:
+        ts.lazy().union(other).select('a').resample(MonthlyGranularity(), how='sum').collect()
+
+        runs as (see explain):
+            source (only title 'a')
+            union how='sum'
+                source (only title 'a')
+            resample MonthlyGranularity how='sum'
+    """
+
+    def __init__(self, source: TimeSeries, steps: Tuple[Step, ...] = ()):
+        self.source = source
+        self.steps = steps
+
+    def __then(self, name: str, **params) -> 'LazyTimeSeries':
+        return LazyTimeSeries(self.source, self.steps + ((name, params),))
+
+    def select(self, titles: Union[List[str], str]) -> 'LazyTimeSeries':
+        """Keep only the given titles."""
+        if isinstance(titles, str):
+            titles = [titles]
+        return self.__then('select', titles=list(titles))
+
+    def between(self, start_date: date = None, end_date: date = None) -> 'LazyTimeSeries':
+        """Keep only the days from start_date to end_date (both included, None for no bound)."""
+        return self.__then('between', start_date=start_date, end_date=end_date)
+
+    def union(self, other: Union[TimeSeries, 'LazyTimeSeries'], how: str = 'sum') -> 'LazyTimeSeries':
+        """Merge with another series on all days, reducing each title with a named reduction."""
+        return self.__then('union', other=_as_lazy(other), how=how)
+
+    def intersection(self, other: Union[TimeSeries, 'LazyTimeSeries'], how: str = 'sum') -> 'LazyTimeSeries':
+        """Merge with another series on shared days, reducing each title with a named reduction."""
+        return self.__then('intersection', other=_as_lazy(other), how=how)
+
+    def resample(self, granularity: Granularity, how: str = 'sum', index_of_granularity: int = 0) -> 'LazyTimeSeries':
+        """Reduce each title within each time step (see TimeSeries.resample)."""
+        return self.__then('resample', granularity=granularity, how=how, index_of_granularity=index_of_granularity)
+
+    def interpolate(self, titles: List[str] = None, method: str = 'linear') -> 'LazyTimeSeries':
+        """Fill missing values of the given titles (see TimeSeries.interpolate_all)."""
+        return self.__then('interpolate', titles=None if titles is None else list(titles), method=method)
+
+    def optimize(self) -> 'LazyTimeSeries':
+        """Return the optimized plan, with fused and pushed down steps."""
+        steps = []
+        for name, params in self.steps:
+            if name in MERGES:
+                params = {**params, 'other': params['other'].optimize()}
+            _push(steps, (name, params))
+        return LazyTimeSeries(self.source, tuple(steps))
+
+    def explain(self, indent: int = 0) -> str:
+        """Describe the optimized plan, a step per line."""
+        plan = self.optimize()
+        lines = [f"{' ' * indent}source ({len(plan.source)} days)"]
+        for name, params in plan.steps:
+            description = ' '.join(
+                f"{key}={_describe(value)}" for key, value in params.items() if key != 'other'
+            )
+            lines.append(f"{' ' * indent}{name} {description}".rstrip())
+            if name in MERGES:
+                lines.append(params['other'].explain(indent + 4))
+        return '\n'.join(lines)
+
+    @instrumented
+    def collect(self) -> TimeSeries:
+        """
+        Run the plan.
+
+        Returns:
+            TimeSeries: Resulting (columnar) time series.
+        """
+        columns, granularity = self.optimize().__execute()
+        return ColumnarTimeSeries(
+            columns, data_granularity=granularity, possible_granularity_list=self.source.possible_granularity_list
+        )
+
+    def __execute(self) -> Tuple[ColumnarData, Granularity]:
+        steps = list(self.steps)
+        titles, start_date, end_date = None, None, None
+        while steps and steps[0][0] in ('select', 'between'):
+            name, params = steps.pop(0)
+            if name == 'select':
+                titles = params['titles']
+            else:
+                start_date, end_date = params['start_date'], params['end_date']
+
+        columns = _extract(self.source, titles, start_date, end_date)
+        granularity = self.source.data_granularity
+        for name, params in steps:
+            if name == 'select':
+                columns = columns.select(params['titles'])
+            elif name == 'between':
+                columns = columns.between(params['start_date'], params['end_date'])
+            elif name in MERGES:
+                other, _ = params['other'].__execute()
+                columns = columns.merge(other, how=params['how'], intersection=name == 'intersection')
+                # inferred from the merged dates
+                granularity = None
+            elif name == 'resample':
+                columns = columns.resample(params['granularity'], params['how'], params['index_of_granularity'])
+                granularity = params['granularity']
+            else:
+                columns = columns.interpolate(params['titles'], params['method'])
+        return columns, granularity
+
+
+def _as_lazy(ts: Union[TimeSeries, LazyTimeSeries]) -> LazyTimeSeries:
+    return ts if isinstance(ts, LazyTimeSeries) else LazyTimeSeries(ts)
+
+
+def _describe(value) -> str:
+    if isinstance(value, Granularity):
+        return type(value).__name__
+    return repr(value)
+
+
+def _fuse(name: str, first: dict, second: dict) -> dict:
+    if name == 'select':
+        return {'titles': [title for title in first['titles'] if title in set(second['titles'])]}
+    if name == 'between':
+        starts = [d for d in (first['start_date'], second['start_date']) if d is not None]
+        ends = [d for d in (first['end_date'], second['end_date']) if d is not None]
+        return {'start_date': max(starts, default=None), 'end_date': min(ends, default=None)}
+    # interpolations of the same method
+    if first['titles'] is None or second['titles'] is None:
+        return {'titles': None, 'method': first['method']}
+    return {'titles': first['titles'] + [t for t in second['titles'] if t not in first['titles']], 'method': first['method']}
+
+
+def _push(steps: List[Step], step: Step):
+    """Append a step to an optimized plan, moving it as early as possible."""
+    name, params = step
+    if name == 'interpolate':
+        if steps and steps[-1][0] == name and steps[-1][1]['method'] == params['method']:
+            steps[-1] = (name, _fuse(name, steps[-1][1], params))
+        else:
+            steps.append(step)
+        return
+    if name not in ('select', 'between'):
+        steps.append(step)
+        return
+
+    i = len(steps)
+    while i > 0:
+        prev_name, prev = steps[i - 1]
+        if prev_name == name:
+            steps[i - 1] = (name, _fuse(name, prev, params))
+            return
+        if prev_name in MERGES:
+            other = prev['other']
+            steps[i - 1] = (prev_name, {**prev, 'other': LazyTimeSeries(other.source, other.steps + (step,)).optimize()})
+        elif name == 'select' and prev_name == 'interpolate':
+            if prev['titles'] is not None:
+                steps[i - 1] = (prev_name, {**prev, 'titles': [t for t in prev['titles'] if t in set(params['titles'])]})
+        elif not (name == 'select' and prev_name in PER_TITLE):
+            break
+        i -= 1
+    steps.insert(i, step)
+
+
+def _extract(source: TimeSeries, titles: List[str] = None, start_date: date = None, end_date: date = None) -> ColumnarData:
+    """Columns of the given titles and days of a time series, reading only the needed data."""
+    if 'columns' in source.__dict__ or isinstance(source, ColumnarTimeSeries):
+        columns = source.columns.between(start_date, end_date)
+        return columns if titles is None else columns.select(titles)
+
+    if start_date is not None or end_date is not None:
+        dates = source.dates
+        start = 0 if start_date is None else bisect_left(dates, start_date)
+        stop = len(dates) if end_date is None else bisect_right(dates, end_date)
+        source = source.view(start, stop)
+    if titles is None:
+        return source.columns
+
+    columns = ColumnarData.from_time_series_data(source, titles=sorted(set(titles)))
+    # titles missing from the source are dropped, as select does
+    return columns.select([title for title, mask in zip(columns.titles, columns.mask) if mask.any()])
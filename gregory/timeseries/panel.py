@@ -0,0 +1,335 @@
+from dataclasses import dataclass
+from math import ceil, floor
+from typing import Dict, List, Tuple
+
+import numpy as np
+from statsmodels.tsa.seasonal import seasonal_decompose
+
+from ..dataclass.columnar_data import ColumnarData, reduce_ranges
+from ..granularity.granularity import Granularity
+from ..granularity.utils import beginning_of_granularity, infer_granularity
+from ..util.dictionaries import assert_named_aggregation
+from ..util.instrumentation import instrumented
+from .processing import decompose, moving_average_denominator
+from .time_series import ColumnarTimeSeries, TimeSeries
+
+
+@dataclass
+class TimeSeriesPanel:
+    """
+    Many time series on a shared sorted date axis: for each title, a 2D
+    block of values with a row for each date and a column for each series
+    (NaN where the value is missing), stored together as a single
+    titles x dates x series array. A separate dates x series mask tells
+    which days belong to each series, so that days with no values survive
+    the conversion back to time series.
+
+    Cross-series operations (union, intersection) and operations applied
+    to every series (aggregation, interpolation, decomposition) reduce the
+    blocks with numpy calls on all series at once.
+
+    Example:
+        ts_list = [
+            [TimeSeriesData(day=2022-04-14, data={'a': 1}),
+            TimeSeriesData(day=2022-04-15, data={'a': 2, 'b': 5})],
+            [TimeSeriesData(day=2022-04-15, data={'a': 3})]
+        ]
+
+        TimeSeriesPanel.from_time_series(ts_list, names=['x', 'y']).block('a')
+        returns [[1., nan],
+                 [2., 3.]]
+    """
+    dates: np.ndarray
+    names: list
+    titles: List[str]
+    values: np.ndarray
+    present: np.ndarray
+    granularity: Granularity = None
+
+    @classmethod
+    def from_time_series(cls, ts_list: List[TimeSeries], names: list = None) -> 'TimeSeriesPanel':
+        """
+        Build a panel from a list of time series, on the union of their days.
+
+        Args:
+            ts_list (List[TimeSeries]): Input list of time series.
+            names (list, optional): Name of each series. Defaults to None
+            (the position of each series in the list).
+
+        Returns:
+            TimeSeriesPanel: Panel of the input series.
+        """
+        if names is None:
+            names = list(range(len(ts_list)))
+        assert len(names) == len(ts_list), "'names' and 'ts_list' must have the same length."
+
+        columns_list = [ts.columns for ts in ts_list]
+        dates = np.unique(np.concatenate([columns.dates for columns in columns_list] + [np.array([], 'datetime64[D]')]))
+        titles = sorted(set().union(*(columns.titles for columns in columns_list)))
+        codes = {title: i for i, title in enumerate(titles)}
+
+        values = np.full((len(titles), len(dates), len(ts_list)), np.nan)
+        present = np.zeros((len(dates), len(ts_list)), dtype=bool)
+        for j, columns in enumerate(columns_list):
+            positions = np.searchsorted(dates, columns.dates)
+            present[positions, j] = True
+            rows = np.array([codes[title] for title in columns.titles], dtype=np.intp)
+            values[rows[:, None], positions[None, :], j] = np.where(columns.mask, columns.values, np.nan)
+
+        granularity = infer_granularity(dates, ts_list[0].possible_granularity_list) if ts_list else None
+        return cls(dates=dates, names=list(names), titles=titles, values=values, present=present,
+                   granularity=granularity)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def index_of(self, title: str) -> int:
+        """Return the position of the given title in values."""
+        try:
+            return self.titles.index(title)
+        except ValueError:
+            raise KeyError(title)
+
+    def block(self, title: str) -> np.ndarray:
+        """Return the dates x series values of the given title (no copy)."""
+        return self.values[self.index_of(title)]
+
+    def series(self, name) -> TimeSeries:
+        """Return the series with the given name as a time series."""
+        return self._to_time_series(self.names.index(name))
+
+    def to_time_series(self) -> List[TimeSeries]:
+        """Convert the panel back to a list of time series (in the order of names)."""
+        return [self._to_time_series(j) for j in range(len(self.names))]
+
+    def _to_time_series(self, j: int) -> TimeSeries:
+        days = self.present[:, j]
+        values = self.values[:, days, j]
+        mask = ~np.isnan(values)
+        keep = mask.any(axis=1)
+        columns = ColumnarData(
+            dates=self.dates[days],
+            titles=[title for title, k in zip(self.titles, keep) if k],
+            values=values[keep],
+            mask=mask[keep]
+        )
+        return ColumnarTimeSeries(columns)
+
+    def _reduce_series(self, days: np.ndarray, how: str) -> TimeSeries:
+        assert_named_aggregation(how)
+        values = self.values[:, days].reshape(-1, len(self.names))
+        res, counts = reduce_ranges(values, ~np.isnan(values), np.array([0]), np.array([len(self.names)]), how)
+        shape = (len(self.titles), int(days.sum()))
+        mask = (counts > 0).reshape(shape)
+        columns = ColumnarData(
+            dates=self.dates[days],
+            titles=list(self.titles),
+            values=np.where(mask, res.reshape(shape), np.nan),
+            mask=mask
+        )
+        return ColumnarTimeSeries(columns, data_granularity=self.granularity)
+
+    @instrumented
+    def union(self, how: str = 'sum') -> TimeSeries:
+        """
+        Reduce all series into a single time series, with the days of any
+        of them. Each title is reduced over the series that have a value for
+        it, ignoring missing values.
+
+        Args:
+            how (str, optional): 'sum', 'mean', 'max' or 'min'. Defaults to 'sum'.
+
+        Returns:
+            TimeSeries: Output time series with all days.
+        """
+        return self._reduce_series(self.present.any(axis=1), how)
+
+    @instrumented
+    def intersection(self, how: str = 'sum') -> TimeSeries:
+        """
+        Reduce all series into a single time series, with only the days
+        shared by all of them (see union).
+
+        Args:
+            how (str, optional): 'sum', 'mean', 'max' or 'min'. Defaults to 'sum'.
+
+        Returns:
+            TimeSeries: Output time series with shared days.
+        """
+        return self._reduce_series(self.present.all(axis=1), how)
+
+    @instrumented
+    def aggregate(self, granularity: Granularity, how: str = 'sum', index_of_granularity: int = 0) -> 'TimeSeriesPanel':
+        """
+        Reduce the values of each series within each time step of the given
+        granularity, ignoring missing values (see TimeSeries.resample).
+        Only time steps containing days of the panel are kept.
+
+        Args:
+            granularity (Granularity): Time step of the output panel.
+            how (str, optional): 'sum', 'mean', 'max' or 'min'. Defaults to 'sum'.
+            index_of_granularity (int, optional): The day of the time step
+            to use as its date (0-indexed). Defaults to 0.
+
+        Returns:
+            TimeSeriesPanel: Panel of the aggregated series.
+        """
+        assert_named_aggregation(how)
+        n_titles, n_series = len(self.titles), len(self.names)
+        steps = beginning_of_granularity(self.dates, granularity)
+        starts = np.flatnonzero(np.r_[True, steps[1:] != steps[:-1]])
+        stops = np.r_[starts[1:], len(steps)]
+
+        values = self.values.transpose(0, 2, 1).reshape(n_titles * n_series, len(self))
+        res, counts = reduce_ranges(values, ~np.isnan(values), starts, stops, how)
+        res = np.where(counts > 0, res, np.nan).reshape(n_titles, n_series, len(starts)).transpose(0, 2, 1)
+
+        days = [
+            granularity.get_n_day_of_granularity(day=day, idx=index_of_granularity)
+            for day in steps[starts].astype(object)
+        ]
+        return TimeSeriesPanel(
+            dates=np.array(days, dtype='datetime64[D]'),
+            names=list(self.names),
+            titles=list(self.titles),
+            values=np.ascontiguousarray(res),
+            present=np.add.reduceat(self.present, starts, axis=0) > 0,
+            granularity=granularity
+        )
+
+    @instrumented
+    def interpolate(self, titles: List[str] = None) -> 'TimeSeriesPanel':
+        """
+        Linearly fill the missing values of the given titles on the days of
+        each series, as TimeSeries.interpolate_all does for a single series:
+        values are interpolated on the positions of the days in each series.
+        Missing values before the first or after the last value of a series
+        are left missing.
+
+        Args:
+            titles (List[str], optional): The values to fill. Defaults to
+            None (all titles).
+
+        Returns:
+            TimeSeriesPanel: Panel with filled values.
+        """
+        if titles is None:
+            titles = self.titles
+        rows = np.array([self.index_of(title) for title in titles], dtype=np.intp)
+        values = self.values.copy()
+        y = values[rows]
+
+        n_days = len(self)
+        # position of each day within its series
+        x = np.broadcast_to(np.cumsum(self.present, axis=0) - 1, y.shape)
+        idx = np.arange(n_days)[None, :, None]
+        valid = ~np.isnan(y)
+        prev = np.maximum.accumulate(np.where(valid, idx, -1), axis=1)
+        following = np.flip(np.minimum.accumulate(np.flip(np.where(valid, idx, n_days), axis=1), axis=1), axis=1)
+        fill = ~valid & self.present[None] & (prev >= 0) & (following < n_days)
+
+        prev, following = np.clip(prev, 0, n_days - 1), np.clip(following, 0, n_days - 1)
+        y_prev, y_next = np.take_along_axis(y, prev, axis=1), np.take_along_axis(y, following, axis=1)
+        x_prev, x_next = np.take_along_axis(x, prev, axis=1), np.take_along_axis(x, following, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            interpolated = y_prev + (y_next - y_prev) * (x - x_prev) / (x_next - x_prev)
+        values[rows] = np.where(fill, interpolated, y)
+
+        return TimeSeriesPanel(
+            dates=self.dates, names=list(self.names), titles=list(self.titles), values=values,
+            present=self.present, granularity=self.granularity
+        )
+
+    @instrumented
+    def add_trend_seasonality(
+            self,
+            granularity: Granularity = None,
+            window_size: int = 12,
+            titles: List[str] = None,
+            trend_label: str = "trend",
+            seasonality_label: str = "seasonality",
+    ) -> 'TimeSeriesPanel':
+        """
+        Adds trend and seasonality of the given titles of every series, as
+        add_trend_seasonality does with 'labels' for a single series: results
+        are stored as "<title>_<trend_label>" and
+        "<title>_<seasonality_label>", rounded to two decimals. Series
+        sharing the same available days of a title are decomposed together
+        with a single call on a 2D array, whose floating point results can
+        differ from those of a single series in the last rounded digit (0.01
+        at most). A series with its own available days is decomposed alone,
+        with the same results of add_trend_seasonality.
+
+        Args:
+            granularity (Granularity, optional): Get the time delta used for frequency.
+            Defaults to None (the granularity of the panel).
+            window_size (int): Size of the window used for the moving average.
+            titles (List[str], optional): Titles to decompose. Defaults to None (all titles).
+            trend_label (str, optional): Specify the label of the trend data. Defaults to "trend".
+            seasonality_label (str, optional):  Specify the label of the seasonality data.
+            Defaults to "seasonality".
+
+        Returns:
+            TimeSeriesPanel: Panel with trend and seasonality titles.
+        """
+        if titles is None:
+            titles = self.titles
+        delta = granularity.delta if granularity else self.granularity.delta
+        frequency = int(1 // delta.total_years)
+
+        blocks = {}
+        for title in titles:
+            block = self.block(title)
+            trend = np.full(block.shape, np.nan)
+            seasonality = np.full(block.shape, np.nan)
+            valid = ~np.isnan(block)
+
+            groups = {}
+            for j, column in enumerate(valid.T):
+                if column.any():
+                    groups.setdefault(column.tobytes(), []).append(j)
+            for group in groups.values():
+                days = np.flatnonzero(valid[:, group[0]])
+                if len(group) > 1:
+                    group_trend, group_seasonality = _decompose_columns(block[days][:, group], frequency, window_size)
+                else:
+                    _, group_trend, group_seasonality = decompose(
+                        block[days, group[0]], freq=frequency, window_size=window_size
+                    )
+                trend[days[:, None], group] = np.round(np.asarray(group_trend).reshape([len(days), -1]), 2)
+                seasonality[days[:, None], group] = np.round(np.asarray(group_seasonality).reshape([len(days), -1]), 2)
+
+            blocks[f"{title}_{trend_label}"] = trend
+            if frequency != 1:
+                blocks[f"{title}_{seasonality_label}"] = seasonality
+
+        return self._with_blocks(blocks)
+
+    def _with_blocks(self, blocks: Dict[str, np.ndarray]) -> 'TimeSeriesPanel':
+        titles = sorted(set(self.titles).union(blocks))
+        values = np.empty((len(titles), len(self), len(self.names)))
+        for i, title in enumerate(titles):
+            values[i] = blocks[title] if title in blocks else self.block(title)
+        return TimeSeriesPanel(
+            dates=self.dates, names=list(self.names), titles=titles, values=values,
+            present=self.present, granularity=self.granularity
+        )
+
+
+def _decompose_columns(series: np.ndarray, freq: int, window_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Runs the decomposition of trend_and_seasonality on each column of the
+    given 2D array with a single seasonal_decompose call.
+    """
+    size = len(series)
+    window_size = min([window_size, ceil(size / 4)])
+    result = seasonal_decompose(series, model='additive', period=freq, extrapolate_trend='freq')
+    raw_trend = np.asarray(result.trend).reshape(series.shape)
+
+    # centered moving average of each column with the same weights, as moving_average
+    sums = np.concatenate([np.zeros((1, series.shape[1])), np.cumsum(raw_trend, axis=0)])
+    idx = np.arange(size)
+    low = np.maximum(idx - ceil((window_size - 1) / 2), 0)
+    high = np.minimum(idx + floor((window_size - 1) / 2) + 1, size)
+    trend = (sums[high] - sums[low]) / moving_average_denominator(idx, window_size=window_size, size=size)[:, None]
+    return trend, np.asarray(result.seasonal).reshape(series.shape)
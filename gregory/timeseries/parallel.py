@@ -0,0 +1,178 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from ..dataclass.columnar_data import ColumnarData
+from ..util.instrumentation import instrumented
+from .time_series import ColumnarTimeSeries, TimeSeries
+
+# offsets of the arrays in shared memory blocks are aligned to 8 bytes
+ALIGNMENT = 8
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def pack_columns(ts_list: List[TimeSeries]) -> Tuple[SharedMemory, List[dict]]:
+    """
+    Copy the columnar view of each time series into a new shared memory
+    block, one after the other.
+
+    Args:
+        ts_list (List[TimeSeries]): Input list of time series.
+
+    Returns:
+        Tuple[SharedMemory, List[dict]]: Shared memory block and, for each
+        series, the titles, number of days, offset in the block and
+        granularity needed to read it back with unpack_columns.
+    """
+    columns_list = [ts.columns for ts in ts_list]
+    specs, offset = [], 0
+    for ts, columns in zip(ts_list, columns_list):
+        specs.append({
+            'titles': list(columns.titles),
+            'n_days': len(columns.dates),
+            'offset': offset,
+            'granularity': ts.data_granularity,
+        })
+        offset = _align(offset + columns.dates.nbytes + columns.values.nbytes + columns.mask.nbytes)
+
+    # zero sized blocks are not allowed
+    shm = SharedMemory(create=True, size=max(offset, 1))
+    for columns, spec in zip(columns_list, specs):
+        for name, array in _arrays(shm, spec).items():
+            array[...] = getattr(columns, name)
+    return shm, specs
+
+
+def unpack_columns(shm: SharedMemory, specs: List[dict]) -> List[TimeSeries]:
+    """
+    Read back the time series written by pack_columns, copying their arrays
+    out of the shared memory block so that it can be closed.
+
+    Args:
+        shm (SharedMemory): Shared memory block.
+        specs (List[dict]): Layout of each series in the block.
+
+    Returns:
+        List[TimeSeries]: Columnar time series.
+    """
+    res = []
+    for spec in specs:
+        arrays = {name: array.copy() for name, array in _arrays(shm, spec).items()}
+        columns = ColumnarData(titles=spec['titles'], **arrays)
+        res.append(ColumnarTimeSeries(columns, data_granularity=spec['granularity']))
+    return res
+
+
+def _arrays(shm: SharedMemory, spec: dict) -> dict:
+    n_titles, n_days, offset = len(spec['titles']), spec['n_days'], spec['offset']
+    dates = np.ndarray((n_days,), dtype='datetime64[D]', buffer=shm.buf, offset=offset)
+    offset += dates.nbytes
+    values = np.ndarray((n_titles, n_days), dtype=np.float64, buffer=shm.buf, offset=offset)
+    offset += values.nbytes
+    mask = np.ndarray((n_titles, n_days), dtype=bool, buffer=shm.buf, offset=offset)
+    return {'dates': dates, 'values': values, 'mask': mask}
+
+
+def _apply(func: Callable[[TimeSeries], TimeSeries], ts_list: List[TimeSeries]) -> List[TimeSeries]:
+    res = [func(ts) for ts in ts_list]
+    assert all(isinstance(ts, TimeSeries) for ts in res), "'func' must return a TimeSeries."
+    return res
+
+
+def _apply_chunk(func: Callable[[TimeSeries], TimeSeries], name: str, specs: List[dict]) -> Tuple[str, List[dict]]:
+    shm = SharedMemory(name=name)
+    try:
+        ts_list = unpack_columns(shm, specs)
+    finally:
+        shm.close()
+
+    res_shm, res_specs = pack_columns(_apply(func, ts_list))
+    # the block is unlinked by the parent process once read
+    res_shm.close()
+    return res_shm.name, res_specs
+
+
+def _unlink(name: str):
+    shm = SharedMemory(name=name)
+    shm.close()
+    shm.unlink()
+
+
+@instrumented
+def parallel_map(
+        func: Callable[[TimeSeries], TimeSeries],
+        ts_list: List[TimeSeries],
+        max_workers: Optional[int] = None,
+        chunk_size: int = None,
+) -> List[TimeSeries]:
+    """
+    Apply the same function to many independent time series with a pool of
+    processes.
+
+    Series are shipped to the workers in chunks, each chunk as the columnar
+    arrays of its series copied into a single shared memory block, so that
+    only titles and array offsets are pickled. Results come back the same
+    way, as columnar time series (see ColumnarTimeSeries): only the data and
+    the granularity of the resulting series are kept, not other attributes.
+    The same holds when the function is applied in the calling process.
+    Results are returned in the order of the input series.
+
+    Example:
+        def pipeline(ts):
+            ts = ts.interpolate_all()
+            return aggregate(add_trend_seasonality(ts, labels='all'), 'mean', MonthlyGranularity())
+
+        res = parallel_map(pipeline, ts_list, max_workers=8)
+
+    Args:
+        func (Callable[[TimeSeries], TimeSeries]): Function to apply, that
+        must be picklable (e.g. defined at module level).
+        ts_list (List[TimeSeries]): Input list of time series.
+        max_workers (int, optional): Number of processes, 1 to apply the
+        function in the calling process. Defaults to None (all CPUs).
+        chunk_size (int, optional): Number of series of each chunk. Defaults
+        to None (four chunks per process).
+
+    Returns:
+        List[TimeSeries]: Result of the function for each input series.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    assert max_workers > 0, "'max_workers' must be greater than 0."
+    if max_workers == 1 or len(ts_list) < 2:
+        return [ColumnarTimeSeries(ts.columns, data_granularity=ts.data_granularity) for ts in _apply(func, ts_list)]
+
+    if chunk_size is None:
+        chunk_size = ceil(len(ts_list) / (4 * max_workers))
+    assert chunk_size > 0, "'chunk_size' must be greater than 0."
+
+    chunks = [pack_columns(ts_list[i:i + chunk_size]) for i in range(0, len(ts_list), chunk_size)]
+    res, futures = [], []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_apply_chunk, func, shm.name, chunk_specs) for shm, chunk_specs in chunks]
+            while futures:
+                name, res_specs = futures[0].result()
+                futures.pop(0)
+                res_shm = SharedMemory(name=name)
+                try:
+                    res.extend(unpack_columns(res_shm, res_specs))
+                finally:
+                    res_shm.close()
+                    res_shm.unlink()
+    finally:
+        for shm, _ in chunks:
+            shm.close()
+            shm.unlink()
+        # blocks of the chunks completed after a failure are never read
+        for future in futures:
+            if not future.cancelled() and future.done() and future.exception() is None:
+                _unlink(future.result()[0])
+    return res
@@ -1,13 +1,135 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from hashlib import sha1
 from math import ceil, floor
 import numpy as np
-from typing import Tuple
+from typing import List, Optional, Tuple, Union
 
 from statsmodels.tsa.seasonal import seasonal_decompose
 
+from ..dataclass.columnar_data import EncodedRows
 from ..granularity.granularity import Granularity
 from ..timeseries.time_series import TimeSeries
+from ..util.instrumentation import instrumented
 
 
+def moving_average_denominator(idx: np.ndarray, window_size: int, size: int) -> np.ndarray:
+    """
+    Denominators of the centered moving average at the given positions of a
+    series of the given size, reduced at its head and tail as in
+    moving_average.
+
+    Args:
+        idx (np.ndarray): Positions in the series.
+        window_size (int): Size of the window used for the moving average.
+        size (int): Length of the series.
+
+    Returns:
+        np.ndarray: Denominator of each position.
+    """
+    head_window_size = ceil((window_size - 1) / 2)
+    tail_window_size = floor((window_size - 1) / 2)
+
+    denominator = np.full(len(idx), window_size, dtype=np.float64)
+    if tail_window_size > 0:
+        head = idx < head_window_size
+        denominator[head] += idx[head] - head_window_size
+        from_tail = idx - (size - tail_window_size)
+        tail = from_tail >= 0
+        denominator[tail] -= from_tail[tail] + 1
+    return denominator
+
+
+class MovingAverage:
+    """
+    Centered moving average of a growing series, computed from running
+    (cumulative) sums: appending points costs O(1) each and evaluating any
+    range of smoothed values costs O(1) per value, regardless of the window
+    size.
+
+    The window of each point spans ceil((window_size - 1) / 2) points before
+    and floor((window_size - 1) / 2) points after it, and the denominators at
+    the head and tail of the series are reduced as in moving_average. Windows
+    containing a NaN value evaluate to NaN.
+
+    Since the window is centered, appending a point also changes the last
+    floor((window_size - 1) / 2) smoothed values.
+
+    Example:
+        ma = MovingAverage(window_size=3, series=[1, 2, 3])
+        ma.values() -> [1.5, 2., 2.5]
+
+        ma.append(7)
+        ma.values() -> [1.5, 2., 4., 5.]
+    """
+
+    def __init__(self, window_size: int, series: np.ndarray = None):
+        assert window_size > 0, "'window_size' must be greater than 0."
+        self.window_size = window_size
+        self.head_window_size = ceil((window_size - 1) / 2)
+        self.tail_window_size = floor((window_size - 1) / 2)
+        self._size = 0
+        # running sums and NaN counts, where _sums[i] is the sum of the first i values
+        self._sums = np.zeros(1, dtype=np.float64)
+        self._nans = np.zeros(1, dtype=np.int64)
+        if series is not None:
+            self.extend(series)
+
+    def __len__(self):
+        return self._size
+
+    def __reserve(self, size: int):
+        capacity = len(self._sums)
+        if size > capacity:
+            capacity = max(size, 2 * capacity)
+            self._sums = np.resize(self._sums, capacity)
+            self._nans = np.resize(self._nans, capacity)
+
+    def append(self, value: float):
+        """Add a new point at the end of the series."""
+        self.extend([value])
+
+    def extend(self, values: np.ndarray):
+        """Add new points at the end of the series."""
+        values = np.asarray(values, dtype=np.float64).reshape([-1])
+        nan = np.isnan(values)
+        size = self._size + len(values)
+        self.__reserve(size + 1)
+        self._sums[self._size + 1:size + 1] = self._sums[self._size] + np.cumsum(np.where(nan, 0., values))
+        self._nans[self._size + 1:size + 1] = self._nans[self._size] + np.cumsum(nan)
+        self._size = size
+
+    def denominator(self, idx: np.ndarray) -> np.ndarray:
+        """Denominators of the smoothed values at the given positions."""
+        return moving_average_denominator(idx, window_size=self.window_size, size=self._size)
+
+    def values(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """
+        Smoothed values for the positions in the [start, stop) range.
+
+        Args:
+            start (int, optional): First position. Defaults to 0.
+            stop (int, optional): Position following the last one. Defaults
+            to None (the end of the series).
+
+        Returns:
+            np.ndarray: Smoothed output data.
+        """
+        start, stop, _ = slice(start, stop).indices(self._size)
+        idx = np.arange(start, stop)
+        low = np.maximum(idx - self.head_window_size, 0)
+        high = np.minimum(idx + self.tail_window_size + 1, self._size)
+
+        smoothed = (self._sums[high] - self._sums[low]) / self.denominator(idx)
+        smoothed[self._nans[high] > self._nans[low]] = np.nan
+        return smoothed
+
+    def last(self, n: int = 1) -> np.ndarray:
+        """Last n smoothed values."""
+        return self.values(start=max(self._size - n, 0))
+
+
+@instrumented
 def moving_average(series: np.ndarray, window_size: int, mode: str = 'same') -> np.ndarray:
     """
     Method to apply the moving average smoothing to the give time series.
@@ -20,6 +142,9 @@ def moving_average(series: np.ndarray, window_size: int, mode: str = 'same') ->
     Returns:
         np.ndarray: Smoothed output data.
     """
+    if mode == 'same':
+        # same (1, n) shape as the convolution below
+        return MovingAverage(window_size=window_size, series=series).values().reshape([1, -1])
 
     # create denominator to manage starting and ending part of the timeseries
     denominator = np.full((1, len(series)), window_size, dtype=int)
@@ -35,9 +160,9 @@ def moving_average(series: np.ndarray, window_size: int, mode: str = 'same') ->
     return np.divide(np.convolve(a=series, v=np.ones(window_size), mode=mode), denominator)
 
 
-def trend_and_seasonality(series: np.ndarray, freq: int, window_size: int) -> Tuple:
+def decompose(series: np.ndarray, freq: int, window_size: int) -> Tuple:
     """
-    Extracts trend and seasonal components from time series.
+    Runs the additive seasonal decomposition used by trend_and_seasonality.
 
     Args:
         series (np.ndarray): Input data.
@@ -45,7 +170,7 @@ def trend_and_seasonality(series: np.ndarray, freq: int, window_size: int) -> Tu
         window_size (int): Size of the window used for the moving average.
 
     Returns:
-        Tuple: Array with trend data, array with seasonality data.
+        Tuple: Decomposition result, smoothed trend data, seasonality data.
     """
     window_size = min([window_size, ceil(len(series) / 4)])
 
@@ -58,20 +183,261 @@ def trend_and_seasonality(series: np.ndarray, freq: int, window_size: int) -> Tu
 
     trend = moving_average(series=result.trend, window_size=window_size)
     seasonality = result.seasonal
+    return result, trend, seasonality
+
+
+@instrumented
+def trend_and_seasonality(series: np.ndarray, freq: int, window_size: int) -> Tuple:
+    """
+    Extracts trend and seasonal components from time series.
+
+    Args:
+        series (np.ndarray): Input data.
+        freq (int): Number of occurrences per year.
+        window_size (int): Size of the window used for the moving average.
+
+    Returns:
+        Tuple: Array with trend data, array with seasonality data.
+    """
+    _, trend, seasonality = decompose(series, freq=freq, window_size=window_size)
     return trend, seasonality
 
 
+class SeasonalDecomposition:
+    """
+    Stateful version of trend_and_seasonality for series that grow at the
+    end. After a first full fit, update recomputes only the trailing window
+    affected by the appended points.
+
+    The state kept between calls is the seasonal profile, as running sums
+    and counts of the detrended values whose trend can't change anymore,
+    plus the profile used for the last full write of the seasonality.
+
+    Tolerance:
+        Trend values are always those of a full recompute: the trend is a
+        moving average, and values out of the recomputed window can't change.
+        The seasonal profile is averaged on the whole history, so each update
+        shifts it slightly for all days. Seasonality is rewritten for the
+        whole series when the profile drifts by more than tolerance / 2 from
+        the last full write, which keeps every seasonality value within
+        tolerance of a full recompute (before rounding).
+    """
+
+    def __init__(self, freq: int, window_size: int, tolerance: float = 0.01):
+        self.freq = freq
+        self.window_size = window_size
+        self.tolerance = tolerance
+        # half window of the trend filter of seasonal_decompose
+        self.half_filter = freq // 2
+        self.size = 0
+        self.effective_window_size = None
+        self.profile = None
+        self.written_profile = None
+        self._final_size = 0
+        self._final_sums = np.zeros(freq, dtype=np.float64)
+        self._final_counts = np.zeros(freq, dtype=np.int64)
+
+    def __accumulate(self, detrended: np.ndarray, start: int) -> Tuple[np.ndarray, np.ndarray]:
+        phases = np.arange(start, start + len(detrended)) % self.freq
+        valid = ~np.isnan(detrended)
+        sums = np.bincount(phases[valid], weights=detrended[valid], minlength=self.freq)
+        counts = np.bincount(phases[valid], minlength=self.freq)
+        return sums, counts
+
+    def __profile(self, sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            profile = sums / counts
+        return profile - np.mean(profile)
+
+    def __seasonality(self, start: int, stop: int) -> np.ndarray:
+        return self.profile[np.arange(start, stop) % self.freq]
+
+    def fit(self, series: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Decomposes the whole series and stores the state for later updates.
+
+        Args:
+            series (np.ndarray): Input data.
+
+        Returns:
+            Tuple: Array with trend data, array with seasonality data.
+        """
+        series = np.asarray(series, dtype=np.float64)
+        result, trend, seasonality = decompose(series, freq=self.freq, window_size=self.window_size)
+
+        self.size = len(series)
+        self.effective_window_size = min([self.window_size, ceil(self.size / 4)])
+        self._final_size = self.size - self.half_filter
+        detrended = series[:self._final_size] - np.asarray(result.trend)[:self._final_size]
+        self._final_sums, self._final_counts = self.__accumulate(detrended, start=0)
+        self.profile = np.asarray(seasonality)[:self.freq]
+        self.written_profile = self.profile
+        return trend, seasonality
+
+    def can_update(self, size: int) -> bool:
+        """Check if a series of the given size can be updated incrementally."""
+        if self.profile is None or self.freq < 2 or size <= self.size:
+            return False
+        if min([self.window_size, ceil(size / 4)]) != self.effective_window_size:
+            return False
+        # the recomputed window and the extrapolated head of the trend must not overlap
+        back = self.size - 1 - self.half_filter
+        return back - self.freq >= self.half_filter and back + 2 - self.effective_window_size >= self.half_filter
+
+    def update(self, series: np.ndarray) -> Tuple[int, np.ndarray, int, np.ndarray]:
+        """
+        Updates the decomposition for a series whose first values are the
+        ones of the last fit or update, falling back to a full fit when the
+        update is not possible.
+
+        Args:
+            series (np.ndarray): Input data, with new points at the end.
+
+        Returns:
+            Tuple: Position of the first trend value returned, array with
+            trend data, position of the first seasonality value returned,
+            array with seasonality data.
+        """
+        series = np.asarray(series, dtype=np.float64)
+        if not self.can_update(len(series)):
+            return self.__refit(series)
+
+        size, half = len(series), self.half_filter
+        window_size = self.effective_window_size
+        head_window_size = ceil((window_size - 1) / 2)
+        tail_window_size = floor((window_size - 1) / 2)
+
+        # first trend value that changes, and first one needed to smooth it
+        start = max(0, self.size - half - tail_window_size)
+        low = min(start - head_window_size, size - 1 - half - self.freq)
+
+        # raw trend on [low, back] and extrapolated tail, as seasonal_decompose
+        filt = np.repeat(1. / self.freq, self.freq)
+        if self.freq % 2 == 0:
+            filt = np.array([.5] + [1] * (self.freq - 1) + [.5]) / self.freq
+        back = size - 1 - half
+        trend = np.empty(size - low, dtype=np.float64)
+        trend[:back + 1 - low] = np.convolve(series[low - half:], filt, mode='valid')
+        back_first = back - self.freq
+        k, n = np.linalg.lstsq(
+            np.c_[np.arange(back_first, back), np.ones(back - back_first)],
+            trend[back_first - low:back - low],
+            rcond=-1,
+        )[0]
+        trend[back + 1 - low:] = np.arange(back + 1, size) * k + n
+
+        # move the detrended values that are now final into the running sums
+        final_size = size - half
+        detrended = series[self._final_size:] - trend[self._final_size - low:]
+        split = final_size - self._final_size
+        sums, counts = self.__accumulate(detrended[:split], start=self._final_size)
+        self._final_sums += sums
+        self._final_counts += counts
+        self._final_size = final_size
+        sums, counts = self.__accumulate(detrended[split:], start=final_size)
+        self.profile = self.__profile(self._final_sums + sums, self._final_counts + counts)
+        self.size = size
+
+        # smoothed trend on [start, size)
+        sums = np.concatenate(([0.], np.cumsum(trend)))
+        idx = np.arange(start, size)
+        smoothed = (
+            sums[np.minimum(idx + tail_window_size + 1, size) - low] - sums[idx - head_window_size - low]
+        ) / moving_average_denominator(idx, window_size=window_size, size=size)
+
+        seasonality_start = start
+        if np.max(np.abs(self.profile - self.written_profile)) > self.tolerance / 2:
+            seasonality_start = 0
+            self.written_profile = self.profile
+        return start, smoothed, seasonality_start, self.__seasonality(seasonality_start, size)
+
+    def __refit(self, series: np.ndarray) -> Tuple[int, np.ndarray, int, np.ndarray]:
+        trend, seasonality = self.fit(series)
+        return 0, np.asarray(trend).reshape([-1]), 0, np.asarray(seasonality)
+
+
+def history_checksum(series: np.ndarray) -> str:
+    """
+    Checksum of the values of a decomposed series, to tell whether the
+    history fitted by an incremental decomposition has changed since.
+
+    Args:
+        series (np.ndarray): Decomposed values.
+
+    Returns:
+        str: Hex digest of the values.
+    """
+    return sha1(np.ascontiguousarray(series, dtype=np.float64).tobytes()).hexdigest()
+
+
+def decomposition_rows(days: np.ndarray, values: np.ndarray, label: str) -> EncodedRows:
+    """
+    Builds the encoded rows of a decomposition component, rounded to two
+    decimals and without missing values, to be written back with
+    TimeSeries.update_from_array.
+
+    Args:
+        days (np.ndarray): Days of the component values (datetime64[D]).
+        values (np.ndarray): Component values.
+        label (str): Title of the component.
+
+    Returns:
+        EncodedRows: Rows of the component.
+    """
+    values = np.round(np.asarray(values, dtype=np.float64).reshape([-1]), 2)
+    valid = ~np.isnan(values)
+    return EncodedRows.from_title(days[valid], values[valid], label)
+
+
+def fit_decomposition(series: np.ndarray, freq: int, window_size: int, tolerance: float, incremental: bool) -> Tuple:
+    """
+    Decomposes the given series, fitting a new SeasonalDecomposition in
+    incremental mode.
+
+    Returns:
+        Tuple: Fitted decomposition (None unless incremental), array with
+        trend data, array with seasonality data.
+    """
+    if not incremental:
+        _, trend, seasonality = decompose(series, freq=freq, window_size=window_size)
+        return None, trend, seasonality
+
+    decomposition = SeasonalDecomposition(freq=freq, window_size=window_size, tolerance=tolerance)
+    trend, seasonality = decomposition.fit(series)
+    return decomposition, trend, seasonality
+
+
+@instrumented
 def add_trend_seasonality(
         ts: TimeSeries,
         granularity: Granularity = None,
         window_size: int = 12,
         label: str = None,
         trend_label: str = "trend",
-        seasonality_label: str = "seasonality"
+        seasonality_label: str = "seasonality",
+        labels: Union[List[str], str] = None,
+        max_workers: Optional[int] = 1,
+        incremental: bool = False,
+        tolerance: float = 0.01
 ) -> TimeSeries:
     """
     Adds trend and seasonality data to the given timeseries.
 
+    When many labels are given, each one is decomposed separately and its
+    results are stored as "<label>_<trend_label>" and
+    "<label>_<seasonality_label>". Labels are shipped to the worker
+    processes as plain float arrays, and all results are written back to the
+    time series at once.
+
+    In incremental mode, the state of each decomposition is kept in the
+    'decompositions' attribute of the resulting time series, keyed by the
+    decomposed label and the output labels. When that series is decomposed
+    again after new days have been appended to it, only the trailing window
+    affected by the new days is recomputed (see SeasonalDecomposition for
+    the tolerance on seasonality). Any other change of the decomposed data,
+    detected through a checksum of the fitted values, requires a full
+    recompute.
+
     Args:
         ts (TimeSeries): Input timeseries data.
         granularity (Granularity, optional): Get the time delta used for frequency. Defaults to None.
@@ -81,43 +447,85 @@ def add_trend_seasonality(
         trend_label (str, optional): Specify the label of the trend data. Defaults to "trend".
         seasonality_label (str, optional):  Specify the label of the seasonality data.
         Defaults to "seasonality".
+        labels (Union[List[str], str], optional): Labels to decompose one by one, or "all"
+        for all titles. Can't be used together with label. Defaults to None.
+        max_workers (int, optional): Number of processes used to decompose many labels,
+        None to use all CPUs. Defaults to 1 (decompose in the calling process).
+        incremental (bool, optional): Keep the decomposition state and reuse it for
+        appended days. Requires label or labels. Defaults to False.
+        tolerance (float, optional): Maximum difference of incrementally updated
+        seasonality values from a full recompute. Defaults to 0.01.
 
     Returns:
         TimeSeries: Output timeseries with trend and seasonality information.
     """
-    source = ts.as_np_array()
-    if label:
-        where = source[:, 2] == label
-        source = source[where]
-    series = source[:, 1]
+    if labels is None:
+        if label:
+            days, series = ts.select_title(label)
+        else:
+            assert not incremental, "Incremental mode requires 'label' or 'labels'."
+            encoded = ts.as_encoded_array()
+            days, series = encoded.dates, encoded.values
+        targets = [(label, days, series, trend_label, seasonality_label)]
+    else:
+        assert label is None, "'label' and 'labels' can't be used together."
+        if labels == 'all':
+            labels = ts.titles
+        targets = [
+            (title, *ts.select_title(title), f"{title}_{trend_label}", f"{title}_{seasonality_label}")
+            for title in labels
+        ]
+        if not targets:
+            return ts.copy()
 
     delta = granularity.delta if granularity else ts.data_granularity.delta
     frequency = 1 // delta.total_years
 
-    trend, seasonality = trend_and_seasonality(
-        series,
-        freq=int(frequency),
-        window_size=window_size
-    )
-
-    trend_all = source.copy()
-    trend_all[:, 1] = np.round(trend, 2)
-    trend_all[:, 2] = trend_label
+    resulting_list = ts.copy()
+    states = resulting_list.__dict__.get('decompositions', {}) if incremental else {}
 
-    seasonality_all = source.copy()
-    seasonality_all[:, 1] = np.round(seasonality, 2)
-    seasonality_all[:, 2] = seasonality_label
+    results = [None] * len(targets)
+    to_fit = []
+    for i, (title, days, series, trend_title, seasonality_title) in enumerate(targets):
+        decomposition, last_day, checksum = states.get((title, trend_title, seasonality_title), (None, None, None))
+        if (
+                decomposition is not None
+                and (decomposition.freq, decomposition.window_size) == (int(frequency), window_size)
+                and decomposition.can_update(len(series))
+                and days[decomposition.size - 1] == last_day
+                and history_checksum(series[:decomposition.size]) == checksum
+        ):
+            results[i] = decomposition.update(series)
+        else:
+            to_fit.append(i)
 
-    if frequency == 1:
-        series = trend_all
+    fit = partial(
+        fit_decomposition, freq=int(frequency), window_size=window_size, tolerance=tolerance, incremental=incremental
+    )
+    series_list = [targets[i][2] for i in to_fit]
+    if max_workers == 1 or len(series_list) < 2:
+        fitted = list(map(fit, series_list))
     else:
-        series = np.concatenate((trend_all, seasonality_all), axis=0)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            fitted = list(executor.map(fit, series_list))
 
-    mask = np.isnan(series[:, 1].astype(float))
-    series = series[~mask]
+    for i, (decomposition, trend, seasonality) in zip(to_fit, fitted):
+        title, _, _, trend_title, seasonality_title = targets[i]
+        states[(title, trend_title, seasonality_title)] = (decomposition, None, None)
+        results[i] = (0, trend, 0, seasonality)
 
-    resulting_list = ts.copy()
-    resulting_list.update_from_array(
-        series
-    )
+    rows = []
+    for (title, days, series, trend_title, seasonality_title), (trend_start, trend, seasonality_start, seasonality) \
+            in zip(targets, results):
+        rows.append(decomposition_rows(days[trend_start:], trend, trend_title))
+        if frequency != 1:
+            rows.append(decomposition_rows(days[seasonality_start:], seasonality, seasonality_title))
+        if incremental:
+            key = (title, trend_title, seasonality_title)
+            states[key] = (states[key][0], days[-1], history_checksum(series))
+
+    if incremental:
+        resulting_list.decompositions = states
+
+    resulting_list.update_from_array(EncodedRows.concatenate(rows))
     return resulting_list
@@ -0,0 +1,137 @@
+from collections import deque
+from typing import Union
+
+import numpy as np
+
+from ..granularity.granularity import Granularity
+from ..granularity.utils import subtract_delta
+
+ROLLING_METHODS = ['sum', 'mean', 'min', 'max', 'std']
+
+# longest window reduced with a vectorized pass for each offset
+SMALL_WINDOW = 64
+
+
+def assert_rolling_method(method: str):
+    choices = ROLLING_METHODS
+    e_msg = f"""Unsupported rolling method. Available choices are '{"', '".join(choices)}'."""
+    assert method in choices, e_msg
+
+
+def window_starts(days: np.ndarray, window: Union[int, Granularity]) -> np.ndarray:
+    """
+    Finds the first position of the trailing window ending at each
+    position of the given days.
+
+    Windows sized by count hold the last 'window' positions; windows sized
+    by granularity hold the days in (day - granularity step, day].
+
+    Example:
+        days = ['2022-04-01', '2022-04-05', '2022-04-08', '2022-04-09']
+
+        window = 2
+        returns [0, 0, 1, 2]
+
+        window = WeeklyGranularity()
+        returns [0, 0, 1, 1]
+
+    Args:
+        days (np.ndarray): Sorted days (datetime64[D]).
+        window (Union[int, Granularity]): Number of positions or time step
+        of each window.
+
+    Returns:
+        np.ndarray: First position of each window.
+    """
+    if isinstance(window, Granularity):
+        return np.searchsorted(days, subtract_delta(days, window.delta), side='right')
+    assert window > 0, "'window' must be greater than 0."
+    return np.maximum(np.arange(len(days)) - window + 1, 0)
+
+
+def rolling_window(values: np.ndarray, starts: np.ndarray, how: str = 'mean') -> np.ndarray:
+    """
+    Reduces the trailing window of each value, starting at the given
+    position and ending at the value itself.
+
+    Sums, means and standard deviations (with one degree of freedom, NaN
+    for single values) come from cumulative sums of the values, centered on
+    their mean to limit cancellation errors. Minimums and maximums use a
+    vectorized pass for each offset when windows are small, and a monotonic
+    deque otherwise.
+
+    Args:
+        values (np.ndarray): Input values.
+        starts (np.ndarray): First position of each window (non-decreasing).
+        how (str, optional): Reduction to apply. Defaults to 'mean'.
+
+    Returns:
+        np.ndarray: Reduced value of each window.
+    """
+    assert_rolling_method(how)
+    values = np.asarray(values, dtype=np.float64)
+    if how in ('min', 'max'):
+        return rolling_extreme(values, starts, how)
+
+    stops = np.arange(1, len(values) + 1)
+    counts = stops - starts
+    shift = values.mean() if len(values) else 0.
+    centered = values - shift
+    sums = np.concatenate([[0.], np.cumsum(centered)])
+    sums = sums[stops] - sums[starts]
+    if how == 'sum':
+        return sums + shift * counts
+    if how == 'mean':
+        return sums / counts + shift
+
+    squares = np.concatenate([[0.], np.cumsum(centered ** 2)])
+    squares = squares[stops] - squares[starts]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (squares - sums ** 2 / counts) / (counts - 1)
+    variance[counts < 2] = np.nan
+    return np.sqrt(np.maximum(variance, 0.))
+
+
+def rolling_extreme(values: np.ndarray, starts: np.ndarray, how: str = 'max') -> np.ndarray:
+    """
+    Minimum or maximum of the trailing window of each value (see rolling_window).
+    """
+    if not len(values):
+        return values.copy()
+
+    idx = np.arange(len(values))
+    longest = int((idx + 1 - starts).max())
+    if longest > SMALL_WINDOW:
+        return monotonic_deque(values, starts, how)
+
+    reduce, fill = (np.maximum, -np.inf) if how == 'max' else (np.minimum, np.inf)
+    res = values.copy()
+    shifted = np.empty_like(values)
+    for offset in range(1, longest):
+        shifted[:offset] = fill
+        shifted[offset:] = values[:-offset]
+        reduce(res, np.where(idx - offset >= starts, shifted, fill), out=res)
+    return res
+
+
+def monotonic_deque(values: np.ndarray, starts: np.ndarray, how: str = 'max') -> np.ndarray:
+    """
+    Minimum or maximum of the trailing window of each value in a single
+    pass, keeping the positions of the window candidates in a deque with
+    monotonic values.
+    """
+    values_list, starts_list = values.tolist(), starts.tolist()
+    res = []
+    window = deque()
+    for i, value in enumerate(values_list):
+        if how == 'max':
+            while window and values_list[window[-1]] <= value:
+                window.pop()
+        else:
+            while window and values_list[window[-1]] >= value:
+                window.pop()
+        window.append(i)
+        while window[0] < starts_list[i]:
+            window.popleft()
+        res.append(values_list[window[0]])
+    return np.array(res, dtype=np.float64)
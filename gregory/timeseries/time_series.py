@@ -1,22 +1,72 @@
-from copy import deepcopy
+import weakref
 from datetime import date
-from functools import cached_property
+from itertools import groupby
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Tuple, Union
+from operator import itemgetter
 import numpy as np
-from scipy.interpolate import interp1d
 
+from outatime.granularity import granularity as granularities
+from outatime.granularity.granularity import Granularity
 from outatime.timeseries.time_series import TimeSeries as TS
 from outatime.dataclass.time_series_data import TimeSeriesData
 
+from ..dataclass.columnar_data import ColumnarData, EncodedRows, interpolate_rows
+from ..dataclass.compact_data import CompactData, CompactTimeSeriesData
+from ..dataclass.title_index import TitleEntry, index_titles
+from ..granularity.utils import infer_granularity
+from ..util.dictionaries import TitleProjection, assert_named_aggregation
+from ..util.instrumentation import instrumented, instrumented_cached_property as cached_property
+from ..util.storage import read_columns, write_columns
+from .rolling import assert_rolling_method, rolling_window, window_starts
+
 
 class TimeSeries(TS):
 
-    def __clear_cache(self):
-        """Clear all cached properties."""
-        super().__clear_cache()
-        if hasattr(self, 'as_array'):
-            del self.as_array
-        if hasattr(self, 'titles'):
-            del self.titles
+    def __clear_cache(self, titles: Iterable[str] = None):
+        """
+        Clear cached properties.
+
+        If the titles written to are given, days must be unchanged: dates
+        are kept, the title list is extended with the given titles and the
+        columns and index entries of all other titles are kept aside, so
+        that only the given ones are extracted again.
+
+        The caches of the source of a view (see view) are cleared as well,
+        since written elements may be shared with it.
+        """
+        cache = self.__dict__
+        source = cache['_source']() if '_source' in cache else None
+        if isinstance(source, TimeSeries):
+            source.__clear_cache(titles=titles)
+        elif source is not None:
+            source.__clear_cache()
+
+        if titles is None:
+            super().__clear_cache()
+            # hasattr would evaluate a missing cached property just to drop it
+            for name in (
+                    'as_array', 'titles', 'columns', '_title_columns', 'title_index', '_title_index',
+                    'date_index', 'day_keys',
+            ):
+                cache.pop(name, None)
+            return
+
+        titles = set(titles)
+        cache.pop('as_array', None)
+        if 'titles' in cache:
+            cache['titles'] = sorted(titles.union(cache['titles']))
+
+        kept = cache.pop('_title_columns', {})
+        columns = cache.pop('columns', None)
+        if columns is not None:
+            kept = {title: (values, mask) for title, values, mask in zip(columns.titles, columns.values, columns.mask)}
+        cache['_title_columns'] = {title: column for title, column in kept.items() if title not in titles}
+
+        if 'title_index' in cache or '_title_index' in cache:
+            entries, written = cache.pop('_title_index', ({}, set()))
+            entries = cache.pop('title_index', entries)
+            kept = {title: entry for title, entry in entries.items() if title not in titles}
+            cache['_title_index'] = (kept, written | titles)
 
     @cached_property
     def as_array(self):
@@ -33,18 +83,271 @@ class TimeSeries(TS):
     @cached_property
     def titles(self):
         """List of possible TITLES in the time series data."""
+        if 'title_index' in self.__dict__:
+            return sorted(self.__dict__['title_index'])
         return sorted(set([k for item in self for k in item.data.keys()]))
 
-    def as_np_array(self) -> np.ndarray:
+    @cached_property
+    def title_index(self) -> Dict[str, TitleEntry]:
+        """
+        Inverted index of the time series: for each title, the sorted
+        positions of the days where it is present and its values there.
+
+        Example:
+            [TimeSeriesData(day=2022-04-14, data={'a': 1, 'b': 8}),
+            TimeSeriesData(day=2022-04-15, data={'b': 7})]
+
+            returns {
+                'a': TitleEntry(positions=[0], values=[1.]),
+                'b': TitleEntry(positions=[0, 1], values=[8., 7.])
+            }
+
+        After a write limited to some titles, only those are indexed again.
+        """
+        kept = self.__dict__.pop('_title_index', None)
+        if kept is None:
+            return index_titles(self)
+
+        entries, written = kept
+        return {**entries, **index_titles(self, titles=written)}
+
+    @cached_property
+    def columns(self) -> ColumnarData:
+        """
+        Columnar view of the time series: dates as a datetime64[D] array plus
+        a float64 column and a validity mask for each title. All values must
+        be numeric (or None).
+
+        Example:
+            [TimeSeriesData(day=2022-04-14, data={'a': 1, 'b': 8}),
+            TimeSeriesData(day=2022-04-15, data={'b': 7})]
+
+            returns ColumnarData(
+                dates=['2022-04-14', '2022-04-15'],
+                titles=['a', 'b'],
+                values=[[1., nan], [8., 7.]],
+                mask=[[True, False], [True, True]]
+            )
+
+        After a write limited to some titles, the columns of the other titles
+        are reused and only the written ones are extracted again.
+        """
+        kept = self.__dict__.pop('_title_columns', None)
+        if not kept:
+            return ColumnarData.from_time_series_data(self)
+
+        titles = self.titles
+        extracted = ColumnarData.from_time_series_data(self, titles=[title for title in titles if title not in kept])
+        columns = {title: (values, mask) for title, values, mask in zip(extracted.titles, extracted.values, extracted.mask)}
+        columns.update(kept)
+
+        shape = (len(titles), len(extracted.dates))
+        values, mask = np.empty(shape, dtype=np.float64), np.empty(shape, dtype=bool)
+        for i, title in enumerate(titles):
+            values[i], mask[i] = columns[title]
+        return ColumnarData(dates=extracted.dates, titles=titles, values=values, mask=mask)
+
+    @classmethod
+    def from_columns(cls, columns: ColumnarData, compact: bool = False):
+        """
+        Build a time series from its columnar representation.
+
+        Args:
+            columns (ColumnarData): Input columns, with dates sorted.
+            compact (bool, optional): Store the data of each day as a compact
+            record (see compact). Defaults to False.
+        """
+        ts = cls(columns.to_time_series_data(compact=compact))
+        ts.columns = columns
+        return ts
+
+    @instrumented
+    def compact(self, inplace: bool = False):
+        """
+        Store the data of each day as a compact record: a slotted
+        CompactTimeSeriesData whose data is a CompactData, keeping the values
+        in a float64 array indexed by the ids of a title table shared by the
+        whole series. Data keeps a dictionary-like interface; days added
+        later by update_from_array use the same table.
+
+        Example:
+            [TimeSeriesData(day=2022-04-14, data={'a': 1, 'b': 8}),
+            TimeSeriesData(day=2022-04-15, data={'b': 7})]
+
+            Returns:
+                [CompactTimeSeriesData(day=2022-04-14, data={'a': 1., 'b': 8.}),
+                CompactTimeSeriesData(day=2022-04-15, data={'b': 7.})]
+
+        Args:
+            inplace (bool, optional): Original time series is overwritten
+            if set to True. Defaults to False.
+        """
+        columns = self.columns
+        records = columns.to_time_series_data(compact=True)
+        if inplace:
+            self[:] = records
+            self.columns = columns
+        else:
+            ts = TimeSeries(records, possible_granularity_list=self.possible_granularity_list)
+            ts.columns = columns
+            return ts
+
+    @classmethod
+    def adopt(cls, ts: TS):
+        """
+        Turn an outatime time series into a gregory one in O(1): the object is
+        rebound to this class and returned, without copying, validating or
+        sorting its elements again. The input object itself changes class.
+
+        Args:
+            ts (outatime.timeseries.time_series.TimeSeries): Input time series.
+        """
+        if not isinstance(ts, cls):
+            ts.__class__ = cls
+        return ts
+
+    @instrumented
+    def save(self, path: str):
+        """
+        Save the time series to a single binary file in columnar format:
+        a date column, a float64 value column and a validity mask for each
+        title, and the title dictionary. Values are stored as floats and
+        None values are dropped.
+
+        Args:
+            path (str): Output file path.
+        """
+        granularity = type(self.data_granularity).__name__ if self.data_granularity is not None else None
+        write_columns(path, self.columns, metadata={'granularity': granularity})
+
+    @classmethod
+    @instrumented
+    def load(cls, path: str, mmap: bool = True):
+        """
+        Load a time series saved with TimeSeries.save.
+        The returned time series is a ColumnarTimeSeries: no element is built
+        until the series is accessed as a list, and columnar operations work
+        directly on the (memory-mapped) file content.
+
+        Args:
+            path (str): Input file path.
+            mmap (bool, optional): Memory-map the file instead of reading it
+            into memory. Defaults to True.
+        """
+        columns, metadata = read_columns(path, mmap=mmap)
+        granularity = getattr(granularities, metadata.get('granularity') or '', None)
+        if not (isinstance(granularity, type) and issubclass(granularity, Granularity)):
+            granularity = None
+        return ColumnarTimeSeries(columns, data_granularity=granularity() if granularity else None)
+
+    def view(self, start: int, stop: int):
+        """
+        Return the elements between the given positions as a new time series
+        that shares them with this one: elements are neither copied nor
+        sorted again, and the data granularity is inherited instead of
+        being inferred. Changes to the data of shared elements are seen by
+        both time series: writes through the view (e.g. update_from_array or
+        interpolate with inplace) also clear the cached data of this time
+        series. Copies of the view are independent of it.
+
+        Args:
+            start (int): Position of the first element.
+            stop (int): Position following the last element.
+        """
+        view = _derived(self, list.__getitem__(self, slice(start, stop)), self.dates[start:stop])
+        view.__dict__['_source'] = weakref.ref(self)
+        return view
+
+    def __getstate__(self):
+        # weak references can't be pickled, and copies don't share elements anyway
+        state = dict(self.__dict__)
+        state.pop('_source', None)
+        return state
+
+    def lazy(self):
+        """
+        Start a lazy plan of operations on the time series, run by collect
+        (see LazyTimeSeries).
+
+        Example:
+            ts.lazy().union(other).select('a').resample(MonthlyGranularity(), how='sum').collect()
+        """
+        # imported here as the lazy module depends on this one
+        from .lazy import LazyTimeSeries
+        return LazyTimeSeries(self)
+
+    @instrumented
+    def as_np_array(self, columnar: bool = False) -> np.ndarray:
         """
         Return the time series as a numpy array, with a row for each data
         value.
+
+        Args:
+            columnar (bool, optional): Build the rows from the columnar view,
+            for numeric data only: values are read back as floats, rows are
+            ordered by day and title and missing (None) values are skipped.
+            Defaults to False.
         """
+        if columnar:
+            return self.as_encoded_array().decode()
         return np.array(self.as_array)
 
+    def as_encoded_array(self) -> EncodedRows:
+        """
+        Return the time series in long format as in as_np_array, with titles
+        encoded as int32 codes into a title table instead of repeated
+        strings: dates are datetime64[D] and values float64 arrays.
+
+        Example:
+            [TimeSeriesData(day=2022-04-16, data={'a': 1, 'b': 8})]
+
+            returns EncodedRows(
+                dates=['2022-04-16', '2022-04-16'],
+                values=[1., 8.],
+                codes=[0, 1],
+                titles=['a', 'b']
+            )
+        """
+        return self.columns.encoded_rows()
+
+    @instrumented
+    def select_title(self, title: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Select the days and the values of the given title where it is
+        available (not None), in time proportional to the number of values
+        of the title.
+
+        Example:
+            [TimeSeriesData(day=2022-04-14, data={'a': 1, 'b': 8}),
+            TimeSeriesData(day=2022-04-15, data={'b': 7}),
+            TimeSeriesData(day=2022-04-16, data={'a': 3, 'b': 8})]
+
+            title = 'a'
+
+            Returns:
+                (['2022-04-14', '2022-04-16'], [1., 3.])
+
+        Args:
+            title (str): Title to select.
+
+        Returns:
+            Tuple: Array of days (datetime64[D]), array of values.
+        """
+        assert title in self.title_index, "requested title is missing"
+
+        entry = self.title_index[title]
+        valid = entry.valid()
+        dates = self.dates
+        days = np.array([dates[position] for position in entry.positions[valid].tolist()], dtype='datetime64[D]')
+        return days, entry.values[valid]
+
+    @instrumented
     def filter_by_title(self, title: str, inplace: bool = False):
         """
         Filter the time series to return only the given key for all days.
+        Unless inplace, the returned time series is a lightweight view: its
+        elements share the original days and project the original data on
+        the given key, copying it only when written to.
 
         Example:
             [TimeSeriesData(day=2022-04-14, data={'a': 1, 'b': 8}),
@@ -65,19 +368,75 @@ class TimeSeries(TS):
         """
         assert title in self.titles, "requested title is missing"
 
-        temp_ts = deepcopy(self)
-        for element in temp_ts:
-            try:
-                element.data = {title: element.data.get(title)}
-            except KeyError:
-                element.data = {}
-
-        temp_ts.__clear_cache()
-
         if inplace:
-            self[:] = temp_ts
+            # elements are replaced, as other time series may share them (see view)
+            filtered = [TimeSeriesData(day=element.day, data={title: (element.data or {}).get(title)}) for element in self]
+            list.__setitem__(self, slice(None), filtered)
+            self.__clear_cache()
         else:
-            return temp_ts
+            filtered = [TimeSeriesData(day=element.day, data=TitleProjection(element.data, title)) for element in self]
+            return _derived(self, filtered, self.dates)
+
+    @cached_property
+    def date_index(self) -> Dict[date, int]:
+        """Position of each day in the time series."""
+        return {day: i for i, day in enumerate(self.dates)}
+
+    @cached_property
+    def day_keys(self) -> FrozenSet[str]:
+        """Days of the time series as "%Y-%m-%d" strings."""
+        return frozenset(day.strftime("%Y-%m-%d") for day in self.dates)
+
+    def append(self, object_: TimeSeriesData):
+        """
+        Add a new TimeSeriesData object to the time series, replacing the
+        element of the same day if any.
+
+        A day following the last one that doesn't change the data
+        granularity is appended without sorting the series or inferring its
+        granularity again, extending copies of dates, date index and day
+        keys if already computed, so that those returned before are left
+        unchanged. Otherwise the series is sorted and its granularity
+        inferred again.
+        """
+        assert isinstance(object_, TimeSeriesData), "Only TimeSeriesData objects can be appended."
+        granularity = self.data_granularity
+        if (
+                len(self) < 2 or granularity is None or object_.day <= self[-1].day
+                or granularity.get_beginning_of_granularity(object_.day)
+                == granularity.get_beginning_of_granularity(self[-1].day)
+        ):
+            return super().append(object_)
+
+        cache = self.__dict__
+        kept = {name: cache[name] for name in ('dates', 'date_index', 'day_keys') if name in cache}
+        list.append(self, object_)
+        self.__clear_cache()
+        if 'dates' in kept:
+            kept['dates'] = kept['dates'] + [object_.day]
+        if 'date_index' in kept:
+            kept['date_index'] = {**kept['date_index'], object_.day: len(self) - 1}
+        if 'day_keys' in kept:
+            kept['day_keys'] = kept['day_keys'] | {object_.day.strftime("%Y-%m-%d")}
+        cache.update(kept)
+
+    def get(self, day: date, value: Any = None) -> TimeSeriesData:
+        """
+        Search the time series element for the given day, in constant time
+        through the date index.
+
+        Args:
+            day (date): The day to search in the time series.
+            value (None, optional): Give a default value to set as 'data' when
+            the day is not found. Defaults to None.
+
+        Returns:
+            TimeSeriesData: A time series element for the searched day.
+        """
+        i = self.date_index.get(day)
+        if i is None:
+            return TimeSeriesData(day=day, data=value)
+        return self[i]
 
     def get_series_or_empty(self, day: date):
         """
@@ -87,8 +446,10 @@ class TimeSeries(TS):
         return self.get(day, value={}).data
 
     def keys(self):
-        return {day.strftime("%Y-%m-%d") for day in self.dates}
+        """Days of the time series as "%Y-%m-%d" strings (see day_keys)."""
+        return self.day_keys
 
+    @instrumented
     def interpolate(self, title: str, method: str = 'linear', inplace: bool = False):
         """
         Fill missing values for a given key of time series data.
@@ -111,49 +472,325 @@ class TimeSeries(TS):
             inplace (bool, optional): Original time series is overwritten
             if set to True. Defaults to False.
         """
-        filtered = self.filter_by_title(title=title, inplace=False)
-        filtered_array = [[el.day, el.data.get(
-            title, None), title] for el in filtered]
+        return self.interpolate_all(titles=[title], method=method, inplace=inplace)
+
+    @instrumented
+    def interpolate_all(self, titles: list = None, method: str = 'linear', inplace: bool = False):
+        """
+        Fill missing values for many keys of time series data in a single
+        pass over the columnar view. Titles sharing the same missing days are
+        interpolated with a single call.
+
+        Example:
+            [TimeSeriesData(day=2022-04-14, data={'a': 1, 'b': 8}),
+            TimeSeriesData(day=2022-04-15, data={}),
+            TimeSeriesData(day=2022-04-16, data={'a': 3, 'b': 6})]
+
+            Returns:
+                [TimeSeriesData(day=2022-04-14, data={'a': 1, 'b': 8}),
+                TimeSeriesData(day=2022-04-15, data={'a': 2, 'b': 7}),
+                TimeSeriesData(day=2022-04-16, data={'a': 3, 'b': 6})]
+
+        Args:
+            titles (list, optional): The values to fill. Defaults to None
+            (all titles).
+            method (str, optional): Interpolation method. Defaults to 'linear'.
+            inplace (bool, optional): Original time series is overwritten
+            if set to True. Defaults to False.
+        """
+        if titles is None:
+            titles = self.titles
+        assert all(title in self.titles for title in titles), "requested title is missing"
+
+        # only the given titles must be numeric
+        if 'columns' in self.__dict__:
+            columns = self.columns
+            y = columns.values[[columns.index_of(title) for title in titles]]
+        else:
+            y = ColumnarData.from_time_series_data(self, titles=titles).values
+        y = interpolate_rows(y, method)
+
+        filled = [
+            TimeSeriesData(day=element.day, data={**(element.data or {}), **dict(zip(titles, values))})
+            for element, values in zip(self, y.T.tolist())
+        ]
+
+        if inplace:
+            for element, filled_element in zip(self, filled):
+                element.data = filled_element.data
+            self.__clear_cache(titles=titles)
+        else:
+            return self.__class__(filled)
+
+    @instrumented
+    def resample(
+            self,
+            granularity: Granularity = granularities.DailyGranularity(),
+            method: Callable[[List[Any]], Any] = None,
+            index_of_granularity: int = 0,
+            inplace: bool = False,
+            how: str = None,
+    ):
+        """
+        Select only needed days for the given granularity, or reduce the
+        values of each title within each time step if 'how' is given.
 
-        filtered_array_np = np.array(filtered_array)
+        Named reductions find the beginning of the time step of all dates at
+        once and reduce all titles over each run of days of the same step in
+        a single pass, ignoring missing values; reduced values are floats.
+        Every time step from the first to the last one is returned, with
+        empty data if it has no values. Without 'how', the data of each time
+        step is evaluated by 'method' as in outatime.
+
+        Example:
+            [TimeSeriesData(day=2022-04-14, data={'a': 1, 'b': 8}),
+            TimeSeriesData(day=2022-04-16, data={'a': 3}),
+            TimeSeriesData(day=2022-05-02, data={'a': 2, 'b': 1})]
+
+            granularity = MonthlyGranularity(), how = 'sum'
+
+            Returns:
+                [TimeSeriesData(day=2022-04-01, data={'a': 4., 'b': 8.}),
+                TimeSeriesData(day=2022-05-01, data={'a': 2., 'b': 1.})]
 
-        y = np.array(filtered_array_np[:, 1], dtype=np.float64)
-        x = np.arange(0, len(y))
-        not_nan_y = y[~np.isnan(y)]
-        not_nan_x = np.argwhere(~np.isnan(y)).reshape([-1])
+        Args:
+            granularity (Granularity, optional): Time step to use for
+            selecting ranges. Defaults to DailyGranularity().
+            method (Callable[[List[Any]], Any], optional): Method to
+            apply when evaluating the value of data for a time step.
+            Defaults to None.
+            index_of_granularity (int, optional): The day of the time step
+            to pick as reference (0-indexed). Defaults to 0.
+            inplace (bool, optional): Original time series is overwritten
+            if set to True. Defaults to False.
+            how (str, optional): 'sum', 'mean', 'max' or 'min'. Defaults to
+            None (data evaluated by 'method').
+        """
+        if how is None:
+            return super().resample(granularity, method, index_of_granularity, inplace)
 
-        interpol_f = interp1d(x=not_nan_x, y=not_nan_y, kind=method)
+        assert_named_aggregation(how)
+        assert method is None, "'method' and 'how' can't be both given."
+        if not len(self):
+            return None if inplace else self.__class__()
 
-        filtered_array_np[:, 1] = interpol_f(x)
+        resampled = self.columns.resample(granularity, how, index_of_granularity)
 
         if inplace:
-            self.update_from_array(filtered_array_np)
+            self[:] = resampled.to_time_series_data()
+            self.data_granularity = granularity
         else:
-            temp_ts = deepcopy(self)
-            temp_ts.update_from_array(filtered_array_np)
-            return temp_ts
+            return ColumnarTimeSeries(
+                resampled, data_granularity=granularity, possible_granularity_list=self.possible_granularity_list
+            )
+
+    @instrumented
+    def rolling(
+            self,
+            titles: Union[List[str], str] = None,
+            window: Union[int, Granularity] = 7,
+            how: str = 'mean',
+            suffix: str = None,
+            inplace: bool = False,
+    ):
+        """
+        Compute a rolling-window reduction of the given titles, stored as the
+        new titles "<title>_<suffix>". Each title is reduced over its own
+        available values: windows hold either its last 'window' values or
+        its values in the last granularity step, (day - step, day].
+        All results are written back with a single update.
+
+        Example:
+            [TimeSeriesData(day=2022-04-14, data={'a': 1}),
+            TimeSeriesData(day=2022-04-15, data={'a': 3}),
+            TimeSeriesData(day=2022-04-16, data={'a': 8})]
+
+            titles = 'a', window = 2, how = 'sum'
+
+            Returns:
+                [TimeSeriesData(day=2022-04-14, data={'a': 1, 'a_rolling_sum': 1.}),
+                TimeSeriesData(day=2022-04-15, data={'a': 3, 'a_rolling_sum': 4.}),
+                TimeSeriesData(day=2022-04-16, data={'a': 8, 'a_rolling_sum': 11.})]
+
+        Args:
+            titles (Union[List[str], str], optional): Titles to reduce.
+            Defaults to None (all titles).
+            window (Union[int, Granularity], optional): Number of values or
+            time step of each window. Defaults to 7.
+            how (str, optional): 'sum', 'mean', 'min', 'max' or 'std'.
+            Defaults to 'mean'.
+            suffix (str, optional): Suffix of the new titles. Defaults to
+            None ("rolling_<how>").
+            inplace (bool, optional): Original time series is overwritten
+            if set to True. Defaults to False.
+        """
+        assert_rolling_method(how)
+        if titles is None:
+            titles = self.titles
+        elif isinstance(titles, str):
+            titles = [titles]
+        suffix = suffix or f"rolling_{how}"
+
+        rows = []
+        for title in titles:
+            days, values = self.select_title(title)
+            res = rolling_window(values, window_starts(days, window), how)
+            valid = ~np.isnan(res)
+            rows.append(EncodedRows.from_title(days[valid], res[valid], f"{title}_{suffix}"))
+
+        ts = self if inplace else self.copy()
+        if rows:
+            ts.update_from_array(EncodedRows.concatenate(rows))
+        if not inplace:
+            return ts
 
-    def update_from_array(self, __array: list):
+    @instrumented
+    def update_from_array(self, __array: Union[list, EncodedRows]):
         """
         Add all data of the given array to the time series.
         Updates existing elements if already in the time series.
         Input array must be in the following format:
             [[date, value, title]]
+        or be encoded rows (see as_encoded_array), whose values are written
+        as floats.
+
+        Rows are sorted by date once and merged with the (sorted) time
+        series in a single linear pass, grouping the updates of each day.
+        Later rows win over earlier rows for the same day and title.
+        If no day is added, only cached data of the written titles is
+        invalidated.
 
         Args:
-            __array (list): Input array of new data.
-        """
-        for new_element in __array:
-            try:
-                stored_element = self.get(new_element[0])
-                stored_element.data.update(
-                    {new_element[2]: new_element[1]}
-                )
-            except KeyError:
-                self.append(
-                    TimeSeriesData(
-                        day=new_element[0],
-                        data={new_element[2]: new_element[1]}
-                    )
-                )
-        self.__refresh()
+            __array (Union[list, EncodedRows]): Input array of new data.
+        """
+        if not len(__array):
+            return
+        if isinstance(__array, EncodedRows):
+            day_updates = __array.day_updates()
+        else:
+            day_updates = (
+                (day, {row[2]: row[1] for row in rows})
+                for day, rows in groupby(sorted(__array, key=itemgetter(0)), key=itemgetter(0))
+            )
+
+        merged, written = [], set()
+        stored = list(self)
+        table = stored[0].data.table if stored and isinstance(stored[0].data, CompactData) else None
+        i, added = 0, False
+        for day, updates in day_updates:
+            written.update(updates)
+            while i < len(stored) and stored[i].day < day:
+                merged.append(stored[i])
+                i += 1
+            if i < len(stored) and stored[i].day == day:
+                stored_element = stored[i]
+                if stored_element.data is None:
+                    stored_element.data = updates
+                else:
+                    stored_element.data.update(updates)
+                merged.append(stored_element)
+                i += 1
+            elif table is not None:
+                merged.append(CompactTimeSeriesData(day=day, data=CompactData(table, updates)))
+                added = True
+            else:
+                merged.append(TimeSeriesData(day=day, data=updates))
+                added = True
+        merged.extend(stored[i:])
+
+        if added:
+            self[:] = merged
+        else:
+            self.__clear_cache(titles=written)
+
+
+def _derived(ts: TS, elements: list, dates: list) -> TimeSeries:
+    """
+    New time series of the given elements, sorted and with the given dates,
+    inheriting the data granularity of ts instead of inferring it.
+    """
+    res = TimeSeries.__new__(ts.__class__ if isinstance(ts, TimeSeries) else TimeSeries)
+    list.__init__(res, elements)
+    res.data_granularity = ts.data_granularity
+    res.__dict__['dates'] = dates
+    return res
+
+
+class ColumnarTimeSeries(TimeSeries):
+    """
+    Time series backed by its columnar representation only: TimeSeriesData
+    elements are built the first time the series is accessed as a list
+    (iteration, indexing, list methods...), and the object then becomes a
+    plain TimeSeries. Length, dates, titles, start and end dates, the
+    columnar view and everything computed from it don't build them.
+    If not given, the data granularity is inferred from the date column.
+    """
+
+    def __init__(self, columns: ColumnarData, data_granularity: Granularity = None, possible_granularity_list=None):
+        super().__init__(possible_granularity_list=possible_granularity_list)
+        self.columns = columns
+        if data_granularity is None:
+            data_granularity = infer_granularity(columns.dates, self.possible_granularity_list)
+        self.data_granularity = data_granularity
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __reduce_ex__(self, protocol):
+        return self.__class__, (self.columns, self.data_granularity)
+
+    @property
+    def start_date(self) -> date:
+        return self.dates[0]
+
+    @property
+    def end_date(self) -> date:
+        return self.dates[-1]
+
+    @cached_property
+    def dates(self):
+        return self.columns.dates.astype(object).tolist()
+
+    @cached_property
+    def titles(self):
+        return sorted(self.title_index)
+
+    @cached_property
+    def title_index(self) -> Dict[str, TitleEntry]:
+        columns = self.columns
+        index = {}
+        for title, values, mask in zip(columns.titles, columns.values, columns.mask):
+            positions = np.flatnonzero(mask)
+            if len(positions):
+                index[title] = TitleEntry(positions=positions, values=values[positions])
+        return index
+
+    def view(self, start: int, stop: int) -> TimeSeries:
+        """
+        Return the days between the given positions as a new
+        ColumnarTimeSeries sharing the columns of this one (no copy).
+        """
+        return ColumnarTimeSeries(self.columns.slice(start, stop), data_granularity=self.data_granularity)
+
+    def materialize(self) -> TimeSeries:
+        """Build the elements of the time series, turning it into a TimeSeries."""
+        elements = self.columns.to_time_series_data()
+        self.__class__ = TimeSeries
+        list.extend(self, elements)
+        return self
+
+
+def _materializing(name):
+    def method(self, *args, **kwargs):
+        return getattr(self.materialize(), name)(*args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+for _name in (
+        '__iter__', '__reversed__', '__contains__', '__getitem__', '__setitem__', '__delitem__',
+        '__eq__', '__ne__', '__lt__', '__le__', '__gt__', '__ge__',
+        '__add__', '__iadd__', '__mul__', '__rmul__', '__imul__', '__repr__',
+        'append', 'extend', 'insert', 'pop', 'remove', 'clear', 'index', 'count', 'sort', 'reverse',
+):
+    setattr(ColumnarTimeSeries, _name, _materializing(_name))
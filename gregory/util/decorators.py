@@ -1,3 +1,5 @@
+from functools import wraps
+
 from outatime.util.decorators import *
 from outatime.timeseries.time_series import TimeSeries as TimeSeries_
 from gregory.timeseries.time_series import TimeSeries
@@ -6,14 +8,16 @@ from gregory.timeseries.time_series import TimeSeries
 def as_gregory_ts(func):
     """
     Decorator that transform an outatime TimeSeries output in a
-    gregory TimeSeries.
+    gregory TimeSeries. Outputs are adopted in place (see TimeSeries.adopt),
+    so the wrapped function must return newly created time series.
     """
+    @wraps(func)
     def _wrap_outatime_func(*args, **kwargs):
         res = func(*args, **kwargs)
         if isinstance(res, TimeSeries_):
-            return TimeSeries(res[:])
-        elif isinstance(res, list) and isinstance(res[0], TimeSeries_):
-            return [TimeSeries(x[:]) for x in res]
+            return TimeSeries.adopt(res)
+        elif isinstance(res, list) and all(isinstance(x, TimeSeries_) for x in res):
+            return [TimeSeries.adopt(x) for x in res]
         else:
             raise TypeError("Wrapped function's output must be a outatime.timeseries.time_series.TimeSeries object (or list).")
     return _wrap_outatime_func
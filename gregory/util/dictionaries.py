@@ -1,12 +1,22 @@
+from collections.abc import MutableMapping
 from typing import List
 
 
+NAMED_AGGREGATIONS = ['sum', 'mean', 'max', 'min']
+
+
 def assert_supported_aggregation(method):
-    choices = ['sum', 'mean', 'max', 'min']
+    choices = NAMED_AGGREGATIONS
     e_msg = f"""Unsupported aggregation method. Available choices are '{"', '".join(choices)}' or a custom lambda)."""
     assert str(method.__name__) in choices + ['<lambda>'], e_msg
 
 
+def assert_named_aggregation(method: str):
+    choices = NAMED_AGGREGATIONS
+    e_msg = f"""Unsupported aggregation method. Available choices are '{"', '".join(choices)}'."""
+    assert method in choices, e_msg
+
+
 def aggregate_dicts(dicts: List[dict], method=sum) -> dict:
     """
     Given a list of dictionaries, aggregates all values in a new dictionary 
@@ -55,3 +65,65 @@ def merge_with_conflict(a: dict, b: dict) -> dict:
         raise Exception(
             f"Can't merge dictionaries because of shared keys [{', '.join(shared)}]")
     return {**a, **b}
+
+
+class TitleProjection(MutableMapping):
+    """
+    Dictionary-like projection of a source dictionary on a single key.
+    The projection always contains the given key (None if missing from the
+    source) and reads it from the source dictionary until it is written to:
+    the first write copies the projected value into a private dictionary,
+    leaving the source untouched (copy-on-write).
+
+    Example:
+        source = {'a': 1, 'b': 8}
+        title = 'a'
+
+        TitleProjection(source, title) behaves as {'a': 1}
+
+    Copies and pickles of a projection are plain dictionaries.
+    """
+    __slots__ = ('_source', '_title', '_data')
+
+    def __init__(self, source: dict, title: str):
+        self._source = source
+        self._title = title
+        self._data = None
+
+    def __materialize(self) -> dict:
+        if self._data is None:
+            self._data = {self._title: self[self._title]}
+            self._source = None
+        return self._data
+
+    def __getitem__(self, key):
+        if self._data is not None:
+            return self._data[key]
+        if key != self._title:
+            raise KeyError(key)
+        return self._source.get(key) if self._source else None
+
+    def __setitem__(self, key, value):
+        self.__materialize()[key] = value
+
+    def __delitem__(self, key):
+        del self.__materialize()[key]
+
+    def __iter__(self):
+        if self._data is not None:
+            return iter(self._data)
+        return iter((self._title,))
+
+    def __len__(self):
+        if self._data is not None:
+            return len(self._data)
+        return 1
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    def copy(self) -> dict:
+        return dict(self)
@@ -0,0 +1,217 @@
+import threading
+import time
+import tracemalloc
+from copy import deepcopy
+from dataclasses import dataclass
+from functools import cached_property, wraps
+from typing import Callable, List, Union
+
+import numpy as np
+
+from outatime.timeseries.time_series import TimeSeries
+
+
+@dataclass
+class OperationRecord:
+    """Measures of a single call of an instrumented operation."""
+    name: str
+    wall_time: float
+    rows_in: int
+    rows_out: int
+    allocated: int
+
+
+@dataclass
+class CacheRecord:
+    """Access to a cached property: hit if the value was already cached."""
+    name: str
+    hit: bool
+
+
+Record = Union[OperationRecord, CacheRecord]
+
+_lock = threading.Lock()
+# per thread flag set while an instrumented operation is running
+_local = threading.local()
+_enabled = False
+_track_memory = False
+_started_tracing = False
+_callbacks: List[Callable[[Record], None]] = []
+_operations = {}
+_caches = {}
+
+
+def enable(track_memory: bool = False):
+    """
+    Start recording instrumented operations and cache accesses.
+
+    Args:
+        track_memory (bool, optional): Also record the memory allocated by
+        each call (net growth of the memory traced by tracemalloc, started
+        if needed and stopped by disable). Slows down all allocations.
+        Defaults to False.
+    """
+    global _enabled, _track_memory, _started_tracing
+    _track_memory = track_memory
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+    _enabled = True
+
+
+def disable():
+    """
+    Stop recording, and tracemalloc if started by enable. Collected
+    statistics are kept until reset.
+    """
+    global _enabled, _track_memory, _started_tracing
+    _enabled = False
+    _track_memory = False
+    if _started_tracing:
+        tracemalloc.stop()
+        _started_tracing = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def add_callback(callback: Callable[[Record], None]):
+    """Register a function called with each OperationRecord and CacheRecord."""
+    with _lock:
+        _callbacks.append(callback)
+
+
+def remove_callback(callback: Callable[[Record], None]):
+    with _lock:
+        _callbacks.remove(callback)
+
+
+def reset():
+    """Drop all collected statistics."""
+    with _lock:
+        _operations.clear()
+        _caches.clear()
+
+
+def snapshot() -> dict:
+    """
+    Return a copy of the collected statistics.
+
+    Example:
+        {
+            'operations': {
+                'batches.aggregate': {
+                    'calls': 2, 'wall_time': 0.05, 'rows_in': 730, 'rows_out': 106, 'allocated': 0
+                }
+            },
+            'caches': {
+                'TimeSeries.titles': {'hits': 3, 'misses': 1}
+            }
+        }
+    """
+    with _lock:
+        return {'operations': deepcopy(_operations), 'caches': deepcopy(_caches)}
+
+
+def _publish(record: Record):
+    with _lock:
+        if isinstance(record, OperationRecord):
+            stats = _operations.setdefault(
+                record.name, {'calls': 0, 'wall_time': 0., 'rows_in': 0, 'rows_out': 0, 'allocated': 0}
+            )
+            stats['calls'] += 1
+            stats['wall_time'] += record.wall_time
+            stats['rows_in'] += record.rows_in
+            stats['rows_out'] += record.rows_out
+            stats['allocated'] += record.allocated
+        else:
+            stats = _caches.setdefault(record.name, {'hits': 0, 'misses': 0})
+            stats['hits' if record.hit else 'misses'] += 1
+        callbacks = list(_callbacks)
+
+    for callback in callbacks:
+        callback(record)
+
+
+def count_rows(obj) -> int:
+    """Number of rows of a time series, a list of time series or an array."""
+    if isinstance(obj, (TimeSeries, np.ndarray)):
+        return len(obj)
+    if isinstance(obj, (list, tuple)) and obj and all(isinstance(x, TimeSeries) for x in obj):
+        return sum(len(x) for x in obj)
+    if isinstance(obj, list):
+        return len(obj)
+    return 0
+
+
+def instrumented(func: Callable) -> Callable:
+    """
+    Record calls, wall time, rows in and out and allocated memory of the
+    decorated operation while instrumentation is enabled.
+    Operations are named after their class (e.g. 'TimeSeries.interpolate')
+    or module (e.g. 'batches.aggregate').
+    Rows in are counted on all the positional arguments; operations
+    returning None (e.g. inplace ones) count the rows of their first
+    argument as output.
+    Only the outermost instrumented call of each thread is recorded: the
+    operations it calls (e.g. TimeSeries.interpolate_all called by
+    TimeSeries.interpolate) are measured as part of it.
+    """
+    name = func.__qualname__
+    if '.' not in name:
+        name = f"{func.__module__.rsplit('.', 1)[-1]}.{name}"
+
+    @wraps(func)
+    def _wrap(*args, **kwargs):
+        if not _enabled or getattr(_local, 'running', False):
+            return func(*args, **kwargs)
+
+        track_memory = _track_memory and tracemalloc.is_tracing()
+        memory = tracemalloc.get_traced_memory()[0] if track_memory else 0
+        rows_in = sum(count_rows(arg) for arg in args)
+        _local.running = True
+        t = time.perf_counter()
+        try:
+            res = func(*args, **kwargs)
+        finally:
+            _local.running = False
+        wall_time = time.perf_counter() - t
+        allocated = max(tracemalloc.get_traced_memory()[0] - memory, 0) if track_memory else 0
+        rows_out = count_rows(res if res is not None or not args else args[0])
+
+        _publish(OperationRecord(name, wall_time, rows_in, rows_out, allocated))
+        return res
+
+    return _wrap
+
+
+class instrumented_cached_property(cached_property):
+    """
+    cached_property that records cache hits and misses while
+    instrumentation is enabled. Unlike cached_property it is a data
+    descriptor, so that accesses to the cached value can be seen.
+    """
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        cache = instance.__dict__
+        try:
+            value = cache[self.attrname]
+            hit = True
+        except KeyError:
+            value = cache[self.attrname] = self.func(instance)
+            hit = False
+        if _enabled:
+            _publish(CacheRecord(self.func.__qualname__, hit))
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.attrname] = value
+
+    def __delete__(self, instance):
+        try:
+            del instance.__dict__[self.attrname]
+        except KeyError:
+            raise AttributeError(self.attrname)
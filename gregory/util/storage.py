@@ -0,0 +1,114 @@
+import json
+import struct
+from typing import Tuple
+
+import numpy as np
+
+from ..dataclass.columnar_data import ColumnarData
+
+MAGIC = b'GREGORY\x00'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+DTYPES = {
+    'dates': np.dtype('<M8[D]'),
+    'values': np.dtype('<f8'),
+    'mask': np.dtype('|b1'),
+}
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_columns(path: str, columns: ColumnarData, metadata: dict = None):
+    """
+    Write columnar data to a binary file.
+
+    Layout:
+        * magic bytes and format version
+        * length of the header (uint64, little endian)
+        * JSON header with titles, number of days, array offsets and metadata
+        * dates (datetime64[D]), values (float64, titles x days) and mask
+        (bool, titles x days) arrays, each aligned to 64 bytes
+
+    Args:
+        path (str): Output file path.
+        columns (ColumnarData): Data to write.
+        metadata (dict, optional): JSON serializable metadata to store in
+        the header. Defaults to None.
+    """
+    arrays = {
+        'dates': np.ascontiguousarray(columns.dates, dtype=DTYPES['dates']),
+        'values': np.ascontiguousarray(columns.values, dtype=DTYPES['values']),
+        'mask': np.ascontiguousarray(columns.mask, dtype=DTYPES['mask']),
+    }
+
+    offsets, offset = {}, 0
+    for name, array in arrays.items():
+        offsets[name] = offset
+        offset = _align(offset + array.nbytes)
+
+    header = json.dumps({
+        'version': FORMAT_VERSION,
+        'titles': list(columns.titles),
+        'n_days': len(columns.dates),
+        'offsets': offsets,
+        'metadata': metadata or {},
+    }).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.write(b'\x00' * (data_start + offsets[name] - f.tell()))
+            array.tofile(f)
+
+
+def read_columns(path: str, mmap: bool = True) -> Tuple[ColumnarData, dict]:
+    """
+    Read columnar data written by write_columns.
+
+    Args:
+        path (str): Input file path.
+        mmap (bool, optional): Memory-map the arrays (read-only) instead of
+        reading them into memory. Defaults to True.
+
+    Returns:
+        Tuple[ColumnarData, dict]: Columnar data and metadata stored in the
+        header.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"'{path}' is not a gregory time series file.")
+        header_length, = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_length).decode('utf-8'))
+
+    if header['version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported gregory file format version {header['version']}.")
+
+    data_start = _align(len(MAGIC) + 8 + header_length)
+    n_days, n_titles = header['n_days'], len(header['titles'])
+    shapes = {'dates': (n_days,), 'values': (n_titles, n_days), 'mask': (n_titles, n_days)}
+
+    arrays = {}
+    for name, shape in shapes.items():
+        offset = data_start + header['offsets'][name]
+        count = int(np.prod(shape))
+        if mmap and count > 0:
+            # empty arrays can't be mapped
+            arrays[name] = np.memmap(path, dtype=DTYPES[name], mode='r', offset=offset, shape=shape)
+        else:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                arrays[name] = np.fromfile(f, dtype=DTYPES[name], count=count).reshape(shape)
+
+    columns = ColumnarData(
+        dates=arrays['dates'],
+        titles=header['titles'],
+        values=arrays['values'],
+        mask=arrays['mask']
+    )
+    return columns, header['metadata']
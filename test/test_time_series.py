@@ -1,9 +1,13 @@
 from datetime import datetime, date
 
 import numpy as np
-from outatime.granularity.granularity import MonthlyGranularity
+from outatime.granularity.granularity import MonthlyGranularity, WeeklyGranularity
+from outatime.timeseries.time_series import TimeSeries as TimeSeries_
 
-from gregory.timeseries.time_series import TimeSeries
+from gregory.dataclass.columnar_data import EncodedRows
+from gregory.dataclass.compact_data import CompactTimeSeriesData
+from gregory.dataclass.time_series_data import TimeSeriesData
+from gregory.timeseries.time_series import TimeSeries, ColumnarTimeSeries
 from test.utils import data_generation
 
 
@@ -33,6 +37,46 @@ def test_as_np_array():
     ts_as_np_array = ts.as_np_array()
 
     assert isinstance(ts_as_np_array, np.ndarray), "Unexpected type."
+    assert ts_as_np_array.tolist() == ts.as_array, "Unexpected rows."
+    assert np.array_equal(ts.as_np_array(columnar=True), ts_as_np_array), "Unexpected columnar rows."
+
+
+def test_non_numeric_titles():
+    ts = TimeSeries([
+        TimeSeriesData(day=date(2020, 1, 1), data={'b': 'x', 'a': 1}),
+        TimeSeriesData(day=date(2020, 1, 2), data={'b': None}),
+        TimeSeriesData(day=date(2020, 1, 3), data={'a': 3, 'b': 'y'}),
+    ])
+    assert ts.as_np_array().tolist() == ts.as_array, "Unexpected rows."
+
+    res = ts.interpolate('a')
+    assert [x.data for x in res] == [{'b': 'x', 'a': 1.}, {'b': None, 'a': 2.}, {'a': 3., 'b': 'y'}], \
+        "Unexpected values."
+
+
+def test_as_encoded_array():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-01-31')
+    encoded = ts.as_encoded_array()
+
+    assert isinstance(encoded, EncodedRows), "Unexpected type."
+    assert encoded.dates.dtype == np.dtype('datetime64[D]') and encoded.values.dtype == np.float64 \
+        and encoded.codes.dtype == np.int32, "Unexpected dtypes."
+    assert encoded.titles == ts.titles, "Unexpected title table."
+    assert np.array_equal(encoded.decode(), ts.as_np_array(columnar=True)), "Unexpected rows."
+    assert np.array_equal(encoded.select('pippo')[1], ts.select_title('pippo')[1]), "Unexpected values."
+
+    res = TimeSeries()
+    res.update_from_array(encoded)
+    assert list(res) == [x for x in ts if x.data], "Unexpected values."
+
+    rows = EncodedRows.concatenate([
+        EncodedRows.from_title(np.array(['2020-01-01', '2020-02-01'], dtype='datetime64[D]'), [1., 2.], 'new'),
+        EncodedRows.from_title(np.array(['2020-01-01'], dtype='datetime64[D]'), [3.], 'pippo'),
+    ])
+    assert rows.titles == ['new', 'pippo'] and rows.codes.tolist() == [0, 0, 1], "Unexpected codes."
+    ts.update_from_array(rows)
+    assert ts[0].data == {'new': 1., 'pippo': 3., 'pluto': ts[0].data['pluto']}, "Unexpected values."
+    assert ts[-1].day == date(2020, 2, 1) and ts[-1].data == {'new': 2.}, "Unexpected new day."
 
 
 def test_interpolate():
@@ -83,3 +127,236 @@ def test_update_from_array():
     assert 'topolino' == ts.as_array[2][2], "Missing 'topolino' in '2020-01-03' as array data."
     assert 'topolino' == ts.as_array[5][2], "Missing 'topolino' in '2020-01-03' as array data."
 
+
+def test_columns():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-01-05')
+    columns = ts.columns
+
+    assert columns.dates.dtype == np.dtype('datetime64[D]'), "Unexpected dates type."
+    assert columns.titles == ['pippo', 'pluto'], "Unexpected titles."
+    assert columns.values.shape == (2, 5), "Unexpected values shape."
+    assert columns.column('pippo')[0] == ts[0].data['pippo'], "Unexpected column value."
+    assert not columns.mask[0][1] and np.isnan(columns.column('pippo')[1]), "Missing value not masked."
+
+    ts.update_from_array([[date(2020, 1, 3), 5, 'topolino']])
+    assert 'topolino' in ts.columns.titles, "TimeSeries columns not refreshed after update."
+
+
+def test_from_columns():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-01-05')
+    res = TimeSeries.from_columns(ts.columns)
+
+    assert isinstance(res, TimeSeries), "Unexpected type of result."
+    assert res.dates == ts.dates, "Unexpected dates."
+    assert res.as_array == ts.as_array, "Unexpected content."
+
+
+def test_interpolate_all():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-01-05')
+    ts_int = ts.interpolate_all()
+
+    assert ts[1].data == {}, "Original time series has been modified."
+    assert all(set(el.data) == {'pippo', 'pluto'} for el in ts_int), "Missing data has not be filled."
+    assert ts_int[1].data['pippo'] == (ts[0].data['pippo'] + ts[2].data['pippo']) / 2, "Unexpected interpolated value."
+
+    ts.interpolate_all(titles=['pluto'], inplace=True)
+    assert ts[1].data == {'pluto': ts_int[1].data['pluto']}, "Missing data has not be filled in place."
+
+
+def test_filter_by_title_copy_on_write():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-01-05')
+    res = ts.filter_by_title('pippo')
+    assert res.as_array[1] == [ts[1].day, None, 'pippo'], "Unexpected projected array."
+    assert res[0].data == {'pippo': ts[0].data['pippo']}, "Unexpected projected data."
+    assert res.dates == ts.dates, "Unexpected dates."
+
+    res[0].data['pippo'] = -1
+    assert ts[0].data['pippo'] != -1, "Original time series has been modified."
+    assert res[0].data == {'pippo': -1}, "Projected data not written."
+
+    assert res.data_granularity is ts.data_granularity, "Unexpected granularity."
+
+    view = ts.view(0, 3)
+    view.filter_by_title('pluto', inplace=True)
+    assert view.titles == ['pluto'], "View not filtered in place."
+    assert 'pippo' in ts[0].data, "Shared elements have been modified."
+
+    ts.filter_by_title('pluto', inplace=True)
+    assert ts.titles == ['pluto'], "Time series not filtered in place."
+
+
+def test_update_from_array_new_days():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-01-05')
+
+    array_to_insert = [
+        [date(2020, 1, 9), 3, 'topolino'],
+        [date(2019, 12, 31), 1, 'topolino'],
+        [date(2020, 1, 9), 4, 'topolino'],
+        [date(2020, 1, 1), 2, 'topolino'],
+    ]
+
+    ts.update_from_array(array_to_insert)
+
+    assert ts.start_date == date(2019, 12, 31), "Missing new first day."
+    assert ts.end_date == date(2020, 1, 9), "Missing new last day."
+    assert ts.dates == sorted(ts.dates), "Time series is not sorted."
+    assert ts.get(date(2020, 1, 9)).data == {'topolino': 4}, "Last value for a day was not kept."
+    assert ts.get(date(2020, 1, 1)).data['topolino'] == 2, "Existing day was not updated."
+
+
+def test_adopt():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-01-05')
+    outatime_ts = TimeSeries_(ts[:])
+    elements = list(outatime_ts)
+
+    res = TimeSeries.adopt(outatime_ts)
+    assert res is outatime_ts, "Time series has been copied."
+    assert isinstance(res, TimeSeries), "Unexpected type of result."
+    assert list(res) == elements and res[0] is elements[0], "Unexpected content."
+    assert res.titles == ts.titles, "Unexpected titles."
+
+
+def test_save_load(tmp_path):
+    ts = data_generation(start_date='2020-01-01', end_date='2020-03-31')
+    path = str(tmp_path / 'ts.bin')
+    ts.save(path)
+
+    for mmap in [True, False]:
+        res = TimeSeries.load(path, mmap=mmap)
+        assert isinstance(res, ColumnarTimeSeries), "Unexpected type of result."
+        assert list.__len__(res) == 0, "Elements have been built on load."
+        assert len(res) == len(ts), "Unexpected length."
+        assert res.dates == ts.dates and res.titles == ts.titles, "Unexpected dates or titles."
+        assert type(res.data_granularity) is type(ts.data_granularity), "Unexpected granularity."
+        assert list.__len__(res) == 0, "Elements have been built on access to dates."
+
+        assert res == ts, "Unexpected content."
+        assert type(res) is TimeSeries, "Time series has not been materialized."
+
+
+def test_partial_cache_invalidation():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-01-10')
+    columns = ts.columns
+    dates = ts.dates
+
+    ts.update_from_array([[day, 1., 'paperino'] for day in ts.dates[::2]] + [[ts.dates[2], 0., 'pippo']])
+    assert ts.dates is dates, "Dates have been invalidated."
+    assert ts.titles == ['paperino', 'pippo', 'pluto'], "Unexpected titles."
+
+    res = ts.columns
+    expected = TimeSeries(ts[:]).columns
+    assert res is not columns, "Columns have not been invalidated."
+    assert res.titles == expected.titles, "Unexpected titles."
+    assert np.array_equal(res.values, expected.values, equal_nan=True), "Unexpected values."
+    assert np.array_equal(res.mask, expected.mask), "Unexpected mask."
+    assert np.array_equal(res.column('pluto'), columns.column('pluto'), equal_nan=True), "Unexpected values."
+
+
+def test_select_title():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-01-10')
+    index = ts.title_index
+    assert sorted(index) == ts.titles, "Unexpected titles."
+    assert index['pippo'].positions.tolist() == [i for i, element in enumerate(ts) if 'pippo' in element.data], \
+        "Unexpected positions."
+
+    days, values = ts.select_title('pippo')
+    assert days.tolist() == [element.day for element in ts if 'pippo' in element.data], "Unexpected days."
+    assert values.tolist() == [element.data['pippo'] for element in ts if 'pippo' in element.data], "Unexpected values."
+
+    ts.update_from_array([[ts.dates[2], 0., 'pippo']])
+    assert ts.select_title('pippo')[1][1] == 0., "Index has not been invalidated."
+    assert ts.title_index['pluto'] is index['pluto'], "Unexpected invalidation of other titles."
+
+
+def test_rolling():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-06-30')
+    days, values = ts.select_title('pippo')
+
+    res = ts.rolling('pippo', window=3, how='sum')
+    assert isinstance(res, TimeSeries), "Unexpected type of result."
+    assert 'pippo_rolling_sum' not in ts.titles, "Original time series has been modified."
+    res_days, res_values = res.select_title('pippo_rolling_sum')
+    assert np.array_equal(res_days, days), "Unexpected days."
+    assert np.allclose(res_values, [values[max(i - 2, 0):i + 1].sum() for i in range(len(values))]), \
+        "Unexpected values."
+
+    res = ts.rolling('pippo', window=MonthlyGranularity(), how='max', suffix='monthly_max')
+    expected = [
+        values[(days > np.datetime64(day.item() - MonthlyGranularity().delta)) & (days <= day)].max() for day in days
+    ]
+    assert np.array_equal(res.select_title('pippo_monthly_max')[1], expected), "Unexpected values."
+
+    ts.rolling(window=100, how='min', inplace=True)
+    expected = [values[max(i - 99, 0):i + 1].min() for i in range(len(values))]
+    assert np.array_equal(ts.select_title('pippo_rolling_min')[1], expected), "Unexpected values."
+    assert 'pluto_rolling_min' in ts.titles, "Unexpected titles."
+
+
+def test_resample_how():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-12-31')
+    res = ts.resample(granularity=MonthlyGranularity(), how='sum', index_of_granularity=-1)
+    assert isinstance(res, TimeSeries), "Unexpected type of result."
+    assert type(res.data_granularity) is MonthlyGranularity, "Unexpected granularity."
+    assert res.dates == [MonthlyGranularity().get_end_of_granularity(date(2020, month, 1)) for month in range(1, 13)], \
+        "Unexpected dates."
+    for element in res:
+        month = [x for x in ts if (x.day.year, x.day.month) == (element.day.year, element.day.month)]
+        assert element.data == {title: float(sum(x.data.get(title, 0) for x in month)) for title in ts.titles}, \
+            "Unexpected values."
+
+    res = TimeSeries(ts[:60])
+    res.resample(granularity=WeeklyGranularity(), how='max', inplace=True)
+    assert res.dates[0] == date(2019, 12, 30) and len(res) == 9, "Unexpected dates."
+    assert res[0].data == {title: float(max(x.data[title] for x in ts[:5] if x.data)) for title in ts.titles}, \
+        "Unexpected values."
+
+
+def test_compact():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-06-30')
+    res = ts.compact()
+    assert isinstance(res, TimeSeries), "Unexpected type of result."
+    assert isinstance(res[0], CompactTimeSeriesData), "Unexpected type of elements."
+    assert list(res) == list(ts), "Unexpected values."
+    assert res.titles == ts.titles and np.array_equal(res.as_np_array(), ts.as_np_array()), "Unexpected values."
+    assert all(x.data.table is res[0].data.table for x in res), "Title table is not shared."
+    assert not vars(res[0]) and not hasattr(res[0].data, '__dict__'), "Records are not slotted."
+
+    copy = res.copy()
+    assert list(copy) == list(ts), "Unexpected values of copy."
+    copy[0].data['pippo'] = -1
+    assert res[0].data['pippo'] != -1, "Original time series has been modified."
+
+    res.update_from_array([[date(2020, 1, 1), 5, 'new'], [date(2020, 7, 1), 3, 'pippo']])
+    assert res[0].data['new'] == 5 and res[-1].data == {'pippo': 3}, "Unexpected values."
+    assert isinstance(res[-1], CompactTimeSeriesData), "Unexpected type of new element."
+    assert res.titles == ['new', 'pippo', 'pluto'], "Unexpected titles."
+
+    ts.compact(inplace=True)
+    assert isinstance(ts[0], CompactTimeSeriesData), "Time series has not been compacted."
+
+
+def test_date_index():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-01-31')
+    assert ts.get(date(2020, 1, 3)) is ts[2], "Unexpected element."
+    assert ts.get(date(2021, 1, 3), value={}).data == {}, "Unexpected default."
+    assert ts.get_series_or_empty(date(2021, 1, 3)) == {}, "Unexpected default."
+    assert ts.keys() == {day.strftime("%Y-%m-%d") for day in ts.dates}, "Unexpected keys."
+
+    dates, date_index = ts.dates, ts.date_index
+    ts.append(TimeSeriesData(day=date(2020, 2, 1), data={'pippo': 1}))
+    assert len(dates) == len(date_index) == 31 and date(2020, 2, 1) not in date_index, "Previous dates changed."
+    assert ts.get(date(2020, 2, 1)) is ts[-1] and '2020-02-01' in ts.keys(), "Appended day not indexed."
+    assert ts.date_index == {day: i for i, day in enumerate(x.day for x in ts)}, "Unexpected date index."
+    assert ts.titles == ['pippo', 'pluto'] and 'columns' not in ts.__dict__, "Cache not cleared."
+
+    # days out of order or replacing existing ones sort the series again
+    ts.append(TimeSeriesData(day=date(2020, 1, 3), data={'pippo': 2}))
+    ts.append(TimeSeriesData(day=date(2019, 12, 31), data={'pippo': 3}))
+    assert ts.get(date(2020, 1, 3)).data == {'pippo': 2} and ts.get(date(2019, 12, 31)) is ts[0], \
+        "Unexpected element."
+    assert ts.date_index == {day: i for i, day in enumerate(x.day for x in ts)}, "Unexpected date index."
+
+    ts = TimeSeries([TimeSeriesData(day=date(2020, 1, 6), data={}), TimeSeriesData(day=date(2020, 1, 13), data={})])
+    assert isinstance(ts.data_granularity, WeeklyGranularity), "Unexpected granularity."
+    ts.append(TimeSeriesData(day=date(2020, 1, 14), data={}))
+    assert not isinstance(ts.data_granularity, WeeklyGranularity), "Granularity not inferred again."
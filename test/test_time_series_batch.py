@@ -1,7 +1,13 @@
+from typing import Iterator
+
+import numpy as np
+import pytest
 from outatime.granularity.granularity import MonthlyGranularity
+from outatime.timeseries.batches import split as split_
 
-from gregory.timeseries.batches import aggregate, pick_a_day, pick_a_weekday, split
+from gregory.timeseries.batches import aggregate, iter_split, pick_a_day, pick_a_weekday, split
 from gregory.timeseries.time_series import TimeSeries
+from gregory.util.dictionaries import aggregate_dicts
 from test.utils import data_generation
 
 
@@ -39,4 +45,52 @@ def test_split():
     tsl = data_generation()
     res = split(tsl, granularity=MonthlyGranularity())
     assert isinstance(res, list), "Unexpected type of result."
-    assert all([isinstance(x, TimeSeries) for x in res]), "Unexpected type of result content."
\ No newline at end of file
+    assert all([isinstance(x, TimeSeries) for x in res]), "Unexpected type of result content."
+
+
+def test_aggregate_named():
+    tsl = data_generation(start_date='2020-01-01', end_date='2020-12-31')
+    for name, method in [('sum', sum), ('mean', np.mean), ('max', max), ('min', min)]:
+        res = aggregate(tsl, granularity=MonthlyGranularity(), method=name, first_day_of_batch=2, last_day_of_batch=20)
+        expected = aggregate(
+            tsl, granularity=MonthlyGranularity(), method=lambda x: aggregate_dicts(x, method=method),
+            first_day_of_batch=2, last_day_of_batch=20
+        )
+        assert res.dates == expected.dates, f"Unexpected dates for '{name}'."
+        assert all(a.data == pytest.approx(b.data) for a, b in zip(res, expected)), f"Unexpected values for '{name}'."
+
+
+def test_aggregate_default():
+    tsl = data_generation(start_date='2020-01-01', end_date='2020-03-31')
+    res = aggregate(tsl, granularity=MonthlyGranularity())
+    assert isinstance(res, TimeSeries), "Unexpected type of result."
+    assert res[0].data['pippo'] == sum(el.data.get('pippo', 0) for el in tsl[:31]), "Unexpected aggregated value."
+    assert isinstance(res[0].data['pippo'], int), "Unexpected type of aggregated value."
+
+
+def test_split_views():
+    tsl = data_generation(start_date='2020-01-01', end_date='2020-12-31')
+    res = split(tsl, granularity=MonthlyGranularity(), first_day_of_batch=2)
+    expected = split_(tsl, granularity=MonthlyGranularity(), first_day_of_batch=2)
+    assert len(res) == len(expected), "Unexpected number of batches."
+    assert all(list(x) == list(y) and x.dates == y.dates for x, y in zip(res, expected)), "Unexpected content."
+    assert res[0][0] is tsl[2], "Batch elements have been copied."
+
+    res = iter_split(tsl, granularity=MonthlyGranularity(), first_day_of_batch=2)
+    assert isinstance(res, Iterator), "Unexpected type of result."
+    assert [x.dates for x in res] == [x.dates for x in expected], "Unexpected content."
+
+
+def test_split_views_write():
+    tsl = data_generation(start_date='2020-01-01', end_date='2020-03-31')
+    _ = tsl.columns, tsl.title_index, tsl.as_array
+    view = split(tsl, granularity=MonthlyGranularity())[0]
+
+    view.update_from_array([[view.start_date, 1., 'new']])
+    assert 'new' in tsl.titles and tsl.columns.column('new')[0] == 1., "Source caches not cleared."
+    assert tsl.as_array == [[x.day, v, k] for x in tsl for k, v in x.data.items()], "Source caches not cleared."
+
+    view.interpolate('pippo', inplace=True)
+    assert np.array_equal(tsl.columns.column('pippo')[:len(view)], view.columns.column('pippo')), \
+        "Source caches not cleared."
+    assert list(view.copy()) == list(view), "Unexpected copy."
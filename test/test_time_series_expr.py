@@ -137,4 +137,23 @@ def test_list_union():
         datetime.strptime("2020-01-08", "%Y-%m-%d").date(),
         datetime.strptime("2020-01-09", "%Y-%m-%d").date(),
     ]
-    assert expected_result_dates == res.dates, "Unexpected result content."
\ No newline at end of file
+    assert expected_result_dates == res.dates, "Unexpected result content."
+
+
+def test_merge_days():
+    ts_1 = data_generation(start_date='2020-01-01', end_date='2020-01-03')
+    ts_2 = data_generation(start_date='2020-01-02', end_date='2020-01-04')
+
+    res = list(merge_days([ts_1, ts_2]))
+    assert [day for day, _ in res] == union_dates([ts_1.dates, ts_2.dates]), "Unexpected merged days."
+    assert res[0][1] == [ts_1[0], None], "Unexpected group for a day of a single series."
+    assert res[1][1] == [ts_1[1], ts_2[0]], "Unexpected group for a shared day."
+
+
+def test_iter_list_union():
+    ts_1 = data_generation(start_date='2020-01-01', end_date='2020-01-06')
+    ts_2 = data_generation(start_date='2020-01-03', end_date='2020-01-08')
+
+    res = iter_list_union([iter(ts_1), iter(ts_2)], conflict_method=first_or_empty)
+    assert next(res).day == ts_1.start_date, "Unexpected first element."
+    assert [el.day for el in res] == union_dates([ts_1.dates, ts_2.dates])[1:], "Unexpected result content."
@@ -0,0 +1,67 @@
+from datetime import date
+
+from outatime.granularity.granularity import MonthlyGranularity
+
+from gregory.timeseries.ingestion import read_long, iter_periods
+from gregory.timeseries.time_series import TimeSeries
+from test.utils import data_generation
+
+
+def _write_csv(ts, path):
+    with open(path, 'w') as f:
+        f.write('date,title,value\n')
+        for day, value, title in ts.as_array:
+            f.write(f'{day.isoformat()},{title},{value}\n')
+
+
+def _write_jsonl(ts, path):
+    with open(path, 'w') as f:
+        for day, value, title in ts.as_array:
+            f.write(f'{{"date": "{day.isoformat()}", "title": "{title}", "value": {value}}}\n')
+
+
+def test_read_long(tmp_path):
+    ts = data_generation(start_date='2020-01-01', end_date='2020-06-30', empty_data_step=10 ** 9)
+
+    for write, name in [(_write_csv, 'ts.csv'), (_write_jsonl, 'ts.jsonl')]:
+        path = str(tmp_path / name)
+        write(ts, path)
+        res = read_long(path, chunk_size=7)
+        assert isinstance(res, TimeSeries), "Unexpected type of result."
+        assert res == ts, "Unexpected content."
+
+
+def test_iter_periods(tmp_path):
+    ts = data_generation(start_date='2020-01-01', end_date='2020-06-30', empty_data_step=10 ** 9)
+    path = str(tmp_path / 'ts.csv')
+    _write_csv(ts, path)
+
+    res = list(iter_periods(path, MonthlyGranularity(), chunk_size=7))
+    assert len(res) == 6, "Unexpected number of periods."
+    assert all(isinstance(x, TimeSeries) for x in res), "Unexpected type of result."
+    assert [x.start_date.month for x in res] == [1, 2, 3, 4, 5, 6], "Unexpected periods."
+    assert [element for x in res for element in x] == list(ts), "Unexpected content."
+
+
+def test_iter_periods_blank_lines(tmp_path):
+    ts = data_generation(start_date='2020-01-01', end_date='2020-02-29', empty_data_step=10 ** 9)
+    path = str(tmp_path / 'ts.jsonl')
+    _write_jsonl(ts, path)
+    with open(path, 'a') as f:
+        f.write('\n\n')
+
+    res = list(iter_periods(path, MonthlyGranularity(), chunk_size=2))
+    assert [element for x in res for element in x] == list(ts), "Unexpected content."
+    assert read_long(path, chunk_size=2) == ts, "Unexpected content."
+
+
+def test_read_long_csv_blank_lines(tmp_path):
+    path = str(tmp_path / 'ts.csv')
+    with open(path, 'w') as f:
+        f.write('date,title,value\n2022-01-01,a,1\n\n2022-01-02,a,2\n\n\n')
+
+    res = read_long(path, chunk_size=2)
+    assert res.dates == [date(2022, 1, 1), date(2022, 1, 2)], "Unexpected dates."
+    assert list(res.select_title('a')[1]) == [1, 2], "Unexpected values."
+    assert [element for x in iter_periods(path, MonthlyGranularity(), chunk_size=2) for element in x] == list(res), \
+        "Unexpected content."
@@ -0,0 +1,37 @@
+from datetime import date
+
+import numpy as np
+from outatime.granularity.granularity import MonthlyGranularity
+
+from gregory.timeseries.lazy import LazyTimeSeries
+from gregory.timeseries.time_series import ColumnarTimeSeries, TimeSeries
+from test.utils import data_generation
+
+
+def test_optimize():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-12-31')
+    other = data_generation(start_date='2020-06-01', end_date='2021-06-30')
+    plan = ts.lazy().union(other).select(['pippo', 'pluto']).between(end_date=date(2020, 9, 30)).interpolate().select('pippo')
+    assert isinstance(plan, LazyTimeSeries), "Unexpected type of result."
+
+    res = plan.optimize()
+    assert [name for name, _ in res.steps] == ['select', 'between', 'union', 'interpolate'], "Unexpected plan."
+    assert res.steps[0][1]['titles'] == ['pippo'], "Selections have not been fused."
+    assert [name for name, _ in res.steps[2][1]['other'].steps] == ['select', 'between'], "Unexpected plan."
+
+
+def test_collect():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-12-30')
+    other = data_generation(start_date='2020-06-01', end_date='2021-06-30')
+
+    res = ts.lazy().union(other, how='max').select('pippo').interpolate().resample(MonthlyGranularity(), how='mean').collect()
+    assert isinstance(res, ColumnarTimeSeries), "Unexpected type of result."
+    assert type(res.data_granularity) is MonthlyGranularity, "Unexpected granularity."
+
+    merged = TimeSeries.from_columns(ts.columns.merge(other.columns, how='max'))
+    expected = merged.filter_by_title('pippo').interpolate('pippo').resample(MonthlyGranularity(), how='mean')
+    assert res.dates == expected.dates, "Unexpected dates."
+    assert np.allclose(res.select_title('pippo')[1], expected.select_title('pippo')[1]), "Unexpected values."
+
+    res = ts.lazy().intersection(other).between(date(2020, 7, 1), date(2020, 7, 31)).collect()
+    assert res.dates == [day for day in ts.dates if date(2020, 7, 1) <= day <= date(2020, 7, 31)], "Unexpected dates."
@@ -0,0 +1,83 @@
+import numpy as np
+from outatime.granularity.granularity import MonthlyGranularity
+
+from gregory.dataclass.time_series_data import TimeSeriesData
+from gregory.timeseries.batches import aggregate
+from gregory.timeseries.expr import list_union
+from gregory.timeseries.panel import TimeSeriesPanel
+from gregory.timeseries.processing import add_trend_seasonality
+from gregory.timeseries.time_series import TimeSeries
+from test.utils import data_generation
+
+
+def sum_dicts(dicts):
+    res = {}
+    for data in dicts:
+        for title, value in (data or {}).items():
+            res[title] = res.get(title, 0.) + value
+    return res
+
+
+def panel_generation():
+    ts_list = [
+        data_generation(start_date='2020-01-01', end_date='2022-12-31'),
+        data_generation(start_date='2020-02-10', end_date='2023-01-20'),
+    ]
+    return ts_list, TimeSeriesPanel.from_time_series(ts_list, names=['a', 'b'])
+
+
+def test_from_time_series():
+    ts_list, panel = panel_generation()
+    assert len(panel) == len(set(ts_list[0].dates) | set(ts_list[1].dates)), "Unexpected dates."
+    assert panel.block('pippo').shape == (len(panel), 2), "Unexpected shape."
+    res = panel.to_time_series()
+    assert all(isinstance(ts, TimeSeries) for ts in res), "Unexpected type of result."
+    assert list(res[0]) == list(ts_list[0]) and list(panel.series('b')) == list(ts_list[1]), "Unexpected content."
+
+
+def test_union():
+    ts_list, panel = panel_generation()
+    res = panel.union(how='sum')
+    expected = list_union(ts_list, sum_dicts)
+    assert res.dates == expected.dates, "Unexpected dates."
+    assert [element.data for element in res] == [element.data for element in expected], "Unexpected values."
+    assert panel.intersection().dates == sorted(set(ts_list[0].dates) & set(ts_list[1].dates)), "Unexpected dates."
+
+
+def test_aggregate():
+    ts_list, panel = panel_generation()
+    res = panel.aggregate(MonthlyGranularity(), how='mean')
+    assert isinstance(res, TimeSeriesPanel), "Unexpected type of result."
+    for name, ts in zip(res.names, ts_list):
+        assert list(res.series(name)) == list(aggregate(ts, 'mean', MonthlyGranularity())), "Unexpected content."
+
+
+def test_interpolate():
+    ts = TimeSeries([
+        TimeSeriesData(day=day, data=data) for day, data in zip(
+            data_generation(start_date='2020-01-01', end_date='2020-01-05').dates,
+            [{'pippo': 1}, {}, {}, {'pippo': 4}, {}]
+        )
+    ])
+    panel = TimeSeriesPanel.from_time_series([ts, ts[:4]])
+    res = panel.interpolate()
+    assert np.allclose(res.block('pippo')[:4], [[1, 1], [2, 2], [3, 3], [4, 4]]), "Unexpected values."
+    assert np.isnan(res.block('pippo')[4]).all(), "Unexpected extrapolation."
+
+
+def test_add_trend_seasonality():
+    ts_list, _ = panel_generation()
+    # 'a' and 'c' share their days and are decomposed together, 'b' alone
+    ts_list.append(ts_list[0].copy())
+    panel = TimeSeriesPanel.from_time_series(ts_list, names=['a', 'b', 'c'])
+    res = panel.aggregate(MonthlyGranularity()).add_trend_seasonality(titles=['pippo'], window_size=5)
+    for name, ts in zip(res.names, ts_list):
+        expected = add_trend_seasonality(aggregate(ts, 'sum', MonthlyGranularity()), labels=['pippo'], window_size=5)
+        series = res.series(name)
+        assert series.dates == expected.dates and series.titles == expected.titles, "Unexpected dates or titles."
+        for title in expected.titles:
+            # rounded values of grouped series can differ by the last digit
+            assert np.allclose(series.select_title(title)[1], expected.select_title(title)[1], rtol=0, atol=0.011), \
+                "Unexpected values."
+        if name == 'b':
+            assert list(series) == list(expected), "Unexpected content."
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from outatime.granularity.granularity import MonthlyGranularity
+
+from gregory.timeseries.batches import aggregate
+from gregory.timeseries.parallel import pack_columns, parallel_map, unpack_columns
+from gregory.timeseries.time_series import TimeSeries
+from test.utils import data_generation
+
+
+def pipeline(ts):
+    return aggregate(ts.interpolate_all(), 'mean', MonthlyGranularity())
+
+
+def test_pack_columns():
+    ts_list = [data_generation(start_date='2020-01-01', end_date='2020-03-31'), TimeSeries()]
+    shm, specs = pack_columns(ts_list)
+    try:
+        res = unpack_columns(shm, specs)
+    finally:
+        shm.close()
+        shm.unlink()
+    assert all(isinstance(ts, TimeSeries) for ts in res), "Unexpected type of result."
+    assert list(res[0]) == list(ts_list[0]) and len(res[1]) == 0, "Unexpected content."
+    assert type(res[0].data_granularity) is type(ts_list[0].data_granularity), "Unexpected granularity."
+
+
+def test_parallel_map():
+    ts_list = [data_generation(start_date='2020-01-01', end_date='2020-12-30') for _ in range(5)]
+    ts_list = [TimeSeries(ts[2:]) if i % 2 else ts for i, ts in enumerate(ts_list)]
+    expected = [pipeline(ts) for ts in ts_list]
+
+    res = parallel_map(pipeline, ts_list, max_workers=2, chunk_size=2)
+    assert len(res) == len(expected), "Unexpected length."
+    assert all(list(x) == list(y) for x, y in zip(res, expected)), "Unexpected content or order."
+
+
+def failing_pipeline(ts):
+    assert len(ts) > 300, "Too short."
+    return pipeline(ts)
+
+
+def test_parallel_map_serial():
+    ts_list = [data_generation(start_date='2020-01-01', end_date='2020-12-30') for _ in range(3)]
+    serial = parallel_map(pipeline, ts_list, max_workers=1)
+    pool = parallel_map(pipeline, ts_list, max_workers=2, chunk_size=1)
+    assert [type(ts) for ts in serial] == [type(ts) for ts in pool], "Unexpected type of result."
+    assert all(list(x) == list(y) for x, y in zip(serial, pool)), "Unexpected content."
+    assert all(type(x.data_granularity) is type(y.data_granularity) for x, y in zip(serial, pool)), \
+        "Unexpected granularity."
+
+
+def test_parallel_map_error():
+    ts_list = [data_generation(start_date='2020-01-01', end_date='2020-12-30') for _ in range(4)]
+    ts_list[0] = TimeSeries(ts_list[0][:10])
+    blocks = set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+    with pytest.raises(AssertionError):
+        parallel_map(failing_pipeline, ts_list, max_workers=2, chunk_size=1)
+    if os.path.isdir('/dev/shm'):
+        assert set(os.listdir('/dev/shm')) <= blocks, "Unexpected shared memory blocks left."
@@ -1,4 +1,10 @@
-from gregory.timeseries.processing import add_trend_seasonality
+from datetime import date
+
+import numpy as np
+from outatime.timeseries.time_series import TimeSeriesData
+
+from gregory.timeseries.processing import add_trend_seasonality, moving_average, MovingAverage
+from gregory.timeseries.time_series import TimeSeries
 from test.utils import data_generation
 
 
@@ -32,3 +38,81 @@ def test_add_trend_seasonality_target_labels():
     assert "seasonality" not in res.titles, "Unexpected 'seasonality' in resulting data"
     assert "test_trend" in res.titles, "Missing 'test_trend' in resulting data"
     assert "test_seasonality" in res.titles, "Missing 'test_seasonality' in resulting data"
+
+
+def test_add_trend_seasonality_many_labels():
+    ts = data_generation(start_date='2017-01-01', end_date='2020-12-31')
+    res = add_trend_seasonality(ts=ts, labels='all', max_workers=2)
+    for title in ["pippo_trend", "pippo_seasonality", "pluto_trend", "pluto_seasonality"]:
+        assert title in res.titles, f"Missing '{title}' in resulting data"
+
+    single = add_trend_seasonality(ts=ts, label='pluto')
+    assert [el.data.get('pluto_trend') for el in res] == [el.data.get('trend') for el in single], \
+        "Unexpected trend for label 'pluto'"
+
+    res = add_trend_seasonality(ts=ts, labels=[])
+    assert res == ts and res is not ts, "Unexpected result without labels."
+
+
+def test_moving_average():
+    series = np.arange(10, dtype=float)
+    res = moving_average(series, window_size=3)
+    expected = np.convolve(series, np.ones(3), mode='same') / np.array([2] + [3] * 8 + [2])
+    assert res.shape == (1, 10), "Unexpected shape of result."
+    assert np.allclose(res, expected), "Unexpected smoothed values."
+
+
+def test_moving_average_streaming():
+    series = np.random.default_rng(0).normal(size=100)
+    ma = MovingAverage(window_size=7, series=series[:50])
+    for value in series[50:]:
+        ma.append(value)
+    assert len(ma) == 100, "Unexpected number of points."
+    assert np.allclose(ma.values(), moving_average(series, window_size=7)[0]), "Unexpected smoothed values."
+    assert np.allclose(ma.last(5), ma.values()[-5:]), "Unexpected last values."
+
+    series[40] = np.nan
+    smoothed = MovingAverage(window_size=7, series=series).values()
+    assert np.isnan(smoothed[37:44]).all() and not np.isnan(smoothed[:37]).any(), "Unexpected NaN propagation."
+
+
+def test_add_trend_seasonality_incremental():
+    ts = data_generation(start_date='2005-01-01', end_date='2020-12-31', empty_data_step=10 ** 9)
+    res = add_trend_seasonality(ts=ts, label='pluto', incremental=True)
+    assert ('pluto', 'trend', 'seasonality') in res.decompositions, "Missing decomposition state"
+
+    new_days = data_generation(start_date='2021-01-01', end_date='2021-01-10', empty_data_step=10 ** 9)
+    res.update_from_array([[el.day, el.data['pluto'], 'pluto'] for el in new_days])
+
+    updated = add_trend_seasonality(ts=res, label='pluto', incremental=True)
+    expected = add_trend_seasonality(ts=res, label='pluto')
+    for title in ['trend', 'seasonality']:
+        res_values = np.array([el.data[title] for el in updated])
+        expected_values = np.array([el.data[title] for el in expected])
+        assert np.allclose(res_values, expected_values, atol=0.02), f"Unexpected '{title}' values"
+
+
+def test_add_trend_seasonality_incremental_labels():
+    def monthly(start, end):
+        return [
+            TimeSeriesData(day=date(2000 + i // 12, i % 12 + 1, 1), data={'a': i % 12 + i / 10, 'b': 1000 - i})
+            for i in range(start, end)
+        ]
+
+    res = add_trend_seasonality(ts=TimeSeries(monthly(0, 48)), label='a', incremental=True)
+    res.update_from_array([[el.day, value, title] for el in monthly(48, 60) for title, value in el.data.items()])
+
+    # states are kept by decomposed label: 'b' is fitted from scratch
+    updated = add_trend_seasonality(ts=res, label='b', incremental=True)
+    expected = add_trend_seasonality(ts=res, label='b')
+    for title in ['trend', 'seasonality']:
+        assert np.allclose(updated.select_title(title)[1], expected.select_title(title)[1]), \
+            f"Unexpected '{title}' values"
+
+    # edited history is fitted again
+    res = add_trend_seasonality(ts=TimeSeries(monthly(0, 48)), label='a', incremental=True)
+    res.update_from_array([[date(2000, 1, 1), 100., 'a']])
+    res.update_from_array([[el.day, el.data['a'], 'a'] for el in monthly(48, 60)])
+    updated = add_trend_seasonality(ts=res, label='a', incremental=True)
+    expected = add_trend_seasonality(ts=res, label='a')
+    assert np.allclose(updated.select_title('trend')[1], expected.select_title('trend')[1]), "Unexpected 'trend' values"
@@ -36,3 +36,14 @@ def test_merge_with_conflict():
         raise AssertionError("Exception not caught.")
     except Exception:
         pass
+
+
+def test_title_projection():
+    source = {'a': 1, 'b': 2}
+    res = TitleProjection(source, 'a')
+    assert res == {'a': 1}, "Bad projection returned."
+    assert TitleProjection(source, 'c') == {'c': None}, "Bad projection of missing key."
+
+    res['d'] = 4
+    assert res == {'a': 1, 'd': 4}, "Projection not written."
+    assert source == {'a': 1, 'b': 2}, "Source dictionary has been modified."
@@ -0,0 +1,41 @@
+import tracemalloc
+
+from gregory.timeseries.batches import aggregate
+from gregory.util import instrumentation
+from test.utils import data_generation
+
+
+def test_instrumentation():
+    ts = data_generation(start_date='2020-01-01', end_date='2020-03-31')
+    records = []
+    instrumentation.reset()
+    instrumentation.add_callback(records.append)
+    try:
+        _ = ts.copy().filter_by_title('pippo')
+        assert instrumentation.snapshot() == {'operations': {}, 'caches': {}}, "Disabled instrumentation recorded data."
+
+        instrumentation.enable(track_memory=True)
+        _ = ts.titles
+        _ = ts.titles
+        res = aggregate(ts, 'sum')
+        _ = ts.interpolate('pippo')
+    finally:
+        instrumentation.disable()
+        instrumentation.remove_callback(records.append)
+    assert not tracemalloc.is_tracing(), "tracemalloc not stopped."
+
+    stats = instrumentation.snapshot()
+    instrumentation.reset()
+
+    # one more hit of titles and columns by interpolate
+    assert stats['caches']['TimeSeries.titles'] == {'hits': 2, 'misses': 1}, "Unexpected cache statistics."
+    operation = stats['operations']['batches.aggregate']
+    assert operation['calls'] == 1, "Unexpected number of calls."
+    assert operation['rows_in'] == len(ts) and operation['rows_out'] == len(res), "Unexpected number of rows."
+    assert operation['wall_time'] > 0 and operation['allocated'] > 0, "Unexpected measures."
+    assert stats['caches']['TimeSeries.columns'] == {'hits': 1, 'misses': 1}, "Unexpected cache statistics."
+    operations = [record.name for record in records if isinstance(record, instrumentation.OperationRecord)]
+    cache_records = sum(counts['hits'] + counts['misses'] for counts in stats['caches'].values())
+    # interpolate_all is called by interpolate
+    assert operations == ['batches.aggregate', 'TimeSeries.interpolate'], "Unexpected callback records."
+    assert len(records) == len(operations) + cache_records, "Unexpected callback records."